@@ -1,15 +1,23 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
-import tempfile
-import uuid
+import shutil
+from contextlib import closing
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
+from utils.batch import BATCH_MAX_FILES, BATCH_MAX_TOTAL_SIZE, batch_size_limit_message
+from utils.upload import UploadRequest, limit_upload_by_name, limit_upload_size, size_limit_message, spooled_upload
+
 # ======================================================
 # App initialization
 # ======================================================
 app = Flask(__name__)
 
+# Uploaded files are parsed into in-memory buffers that spill to an
+# anonymous temp file only above UPLOAD_SPOOL_THRESHOLD
+app.request_class = UploadRequest
+
 # 🔥 DEV MODE CORS (Allow all origins)
 CORS(app)
 
@@ -38,7 +46,10 @@ app.register_blueprint(watermark_bp)
 # Steganalysis imports
 # ======================================================
 from steganalysis.image_pipeline import analyze_image
-from steganalysis.file_pipeline import analyze_file
+from steganalysis.file_pipeline import FILE_MAX_SIZE, analyze_file
+from steganalysis.result_cache import make_cache_key, cached_result, get_result_cache
+from steganalysis.batch import UPLOAD_MAX_SIZE, new_batch_dir, stage_batch, run_batch, upload_limit
+from steganalysis.jobs import get_job_manager
 
 # ======================================================
 # CRYPTOGRAPHY API
@@ -134,10 +145,22 @@ def steganalysis_handler():
     MAX_FILE_SIZE = 20 * 1024 * 1024
     ALLOWED_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "bmp", "tiff", "webp"}
 
-    if "file" not in request.files:
+    # Reject on Content-Length before reading the body; bodies without one
+    # are cut off while streaming. Images may be up to MAX_FILE_SIZE;
+    # non-image files are scanned in constant memory and may be up to
+    # FILE_MAX_SIZE, so the limit is picked from the uploaded file's name.
+    if not limit_upload_by_name(request, upload_limit, UPLOAD_MAX_SIZE):
+        return jsonify({"error": size_limit_message(UPLOAD_MAX_SIZE)}), 400
+
+    try:
+        files = request.files
+    except RequestEntityTooLarge as e:
+        return jsonify({"error": size_limit_message(getattr(e, "limit", UPLOAD_MAX_SIZE))}), 400
+
+    if "file" not in files:
         return jsonify({"error": "No file uploaded"}), 400
 
-    file = request.files["file"]
+    file = files["file"]
 
     if file.filename == "":
         return jsonify({"error": "Empty filename"}), 400
@@ -147,23 +170,24 @@ def steganalysis_handler():
         return jsonify({"error": "File must have a valid extension"}), 400
 
     extension = filename.rsplit(".", 1)[1].lower()
-    unique_name = f"{uuid.uuid4().hex}_{filename}"
+    limit = MAX_FILE_SIZE if extension in ALLOWED_IMAGE_EXTENSIONS else FILE_MAX_SIZE
 
-    # Save temporarily
-    temp_dir = tempfile.gettempdir()
-    file_path = os.path.join(temp_dir, unique_name)
+    # The upload is held in memory (or a spooled temp file above
+    # UPLOAD_SPOOL_THRESHOLD) and hashed while it streamed in
+    upload = spooled_upload(file)
 
     try:
-        file.save(file_path)
-
-        if os.path.getsize(file_path) > MAX_FILE_SIZE:
-            os.remove(file_path)
-            return jsonify({"error": "File exceeds 20MB limit"}), 400
-
-        if extension in ALLOWED_IMAGE_EXTENSIONS:
-            result = analyze_image(file_path)
-        else:
-            result = analyze_file(file_path)
+        if upload.size > limit:
+            return jsonify({"error": size_limit_message(limit)}), 400
+
+        # Re-submitted uploads are served from the result cache without decoding
+        with upload.buffer() as data:
+            if extension in ALLOWED_IMAGE_EXTENSIONS:
+                cache_key = make_cache_key(upload.digest, "image")
+                result = cached_result(cache_key, lambda: analyze_image(data))
+            else:
+                cache_key = make_cache_key(upload.digest, "file")
+                result = cached_result(cache_key, lambda: analyze_file(data))
 
         return jsonify(result)
 
@@ -179,8 +203,143 @@ def steganalysis_handler():
         return jsonify({"error": str(e)}), 500
 
     finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        upload.close()
+
+
+@app.route("/api/steganalysis/batch", methods=["POST"])
+def steganalysis_batch_handler():
+    """
+    Analyze many files at once: a multipart "files" list and/or a zip
+    "archive". Results stream back as NDJSON, one line per file as it
+    finishes, followed by a {"summary": ...} line.
+    """
+
+    # Room for every batch file plus the archive and a few form fields
+    request.max_form_parts = BATCH_MAX_FILES + 16
+
+    # The whole body is capped; each file is checked against its own
+    # limit while it is staged
+    too_large = {"error": batch_size_limit_message()}
+    if not limit_upload_size(request, BATCH_MAX_TOTAL_SIZE):
+        return jsonify(too_large), 400
+
+    try:
+        files = request.files.getlist("files")
+        archive = request.files.get("archive")
+    except RequestEntityTooLarge:
+        return jsonify(too_large), 400
+
+    if not files and archive is None:
+        return jsonify({"error": "No files uploaded"}), 400
+
+    temp_dir = new_batch_dir()
+
+    try:
+        entries = stage_batch(files, archive, temp_dir)
+    except ValueError as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return jsonify({"error": str(e)}), 400
+
+    # run_batch removes temp_dir once the stream is finished or abandoned
+    return Response(
+        stream_with_context(run_batch(entries, temp_dir)),
+        mimetype="application/x-ndjson"
+    )
+
+
+# ======================================================
+# STEGANALYSIS JOBS (submit / poll / result)
+# ======================================================
+@app.route("/api/steganalysis/jobs", methods=["POST"])
+def steganalysis_job_submit():
+
+    MAX_FILE_SIZE = 20 * 1024 * 1024
+    ALLOWED_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "bmp", "tiff", "webp"}
+
+    if not limit_upload_by_name(request, upload_limit, UPLOAD_MAX_SIZE):
+        return jsonify({"error": size_limit_message(UPLOAD_MAX_SIZE)}), 400
+
+    try:
+        files = request.files
+    except RequestEntityTooLarge as e:
+        return jsonify({"error": size_limit_message(getattr(e, "limit", UPLOAD_MAX_SIZE))}), 400
+
+    if "file" not in files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = files["file"]
+
+    if file.filename == "":
+        return jsonify({"error": "Empty filename"}), 400
+
+    filename = secure_filename(file.filename)
+    if "." not in filename:
+        return jsonify({"error": "File must have a valid extension"}), 400
+
+    extension = filename.rsplit(".", 1)[1].lower()
+    kind = "image" if extension in ALLOWED_IMAGE_EXTENSIONS else "file"
+    limit = MAX_FILE_SIZE if kind == "image" else FILE_MAX_SIZE
+
+    upload = spooled_upload(file)
+
+    with closing(upload):
+        if upload.size > limit:
+            return jsonify({"error": size_limit_message(limit)}), 400
+
+        # The upload stays spooled on disk until a worker picks the job up
+        jobs = get_job_manager()
+        file_path = jobs.spool_path(filename)
+        with open(file_path, "wb") as dst, upload.buffer() as data:
+            dst.write(data)
+
+    cache_key = make_cache_key(upload.digest, kind)
+    job_id = jobs.submit(file_path, kind, cache_key=cache_key)
+
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/steganalysis/jobs/{job_id}",
+        "result_url": f"/api/steganalysis/jobs/{job_id}/result"
+    }), 202
+
+
+@app.route("/api/steganalysis/jobs/<job_id>", methods=["GET"])
+def steganalysis_job_status(job_id):
+
+    record = get_job_manager().get(job_id)
+
+    if record is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    # Status polling stays lightweight; the result has its own endpoint
+    record.pop("result", None)
+    return jsonify(record)
+
+
+@app.route("/api/steganalysis/jobs/<job_id>/result", methods=["GET"])
+def steganalysis_job_result(job_id):
+
+    record = get_job_manager().get(job_id)
+
+    if record is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    if record["status"] == "done":
+        return jsonify(record["result"])
+
+    if record["status"] == "failed":
+        return jsonify({"error": record.get("error", "Analysis failed")}), 500
+
+    return jsonify({
+        "job_id": job_id,
+        "status": record["status"],
+        "progress": record.get("progress", 0.0)
+    }), 202
+
+
+@app.route("/api/steganalysis/cache/stats", methods=["GET"])
+def steganalysis_cache_stats():
+    return jsonify(get_result_cache().stats())
 
 
 # ======================================================
@@ -1,23 +1,21 @@
-import os
-import uuid
 import traceback
 from flask import Blueprint, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
 from steganalysis.image_pipeline import analyze_image
-from steganalysis.file_pipeline import analyze_file
+from steganalysis.file_pipeline import FILE_MAX_SIZE, analyze_file
+from steganalysis.result_cache import make_cache_key, cached_result
+from steganalysis.batch import UPLOAD_MAX_SIZE, upload_limit
+from utils.upload import limit_upload_by_name, size_limit_message, spooled_upload
 
 
 steganalysis_bp = Blueprint("steganalysis", __name__)
 
-UPLOAD_FOLDER = "uploads"
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
 
 ALLOWED_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "bmp", "tiff", "webp"}
 
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 
 @steganalysis_bp.route("/analyze", methods=["POST"])
 def analyze():
@@ -26,6 +24,9 @@ def analyze():
         # ----------------------------
         # Validate File
         # ----------------------------
+        if not limit_upload_by_name(request, upload_limit, UPLOAD_MAX_SIZE):
+            return jsonify({"error": size_limit_message(UPLOAD_MAX_SIZE)}), 400
+
         if "file" not in request.files:
             return jsonify({"error": "No file provided"}), 400
 
@@ -42,29 +43,27 @@ def analyze():
         extension = filename.rsplit(".", 1)[1].lower()
 
         # ----------------------------
-        # Save File
+        # Buffer Upload (in memory)
         # ----------------------------
-        unique_name = f"{uuid.uuid4().hex}_{filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, unique_name)
-
-        file.save(filepath)
+        upload = spooled_upload(file)
 
         # ----------------------------
         # File Size Protection
         # ----------------------------
-        if os.path.getsize(filepath) > MAX_FILE_SIZE:
-            os.remove(filepath)
-            return jsonify({
-                "error": "File exceeds maximum allowed size (20MB)"
-            }), 400
+        limit = MAX_FILE_SIZE if extension in ALLOWED_IMAGE_EXTENSIONS else FILE_MAX_SIZE
+        if upload.size > limit:
+            return jsonify({"error": size_limit_message(limit)}), 400
 
         # ----------------------------
         # Route to Correct Pipeline
         # ----------------------------
-        if extension in ALLOWED_IMAGE_EXTENSIONS:
-            result = analyze_image(filepath)
-        else:
-            result = analyze_file(filepath)
+        with upload.buffer() as data:
+            if extension in ALLOWED_IMAGE_EXTENSIONS:
+                cache_key = make_cache_key(upload.digest, "image")
+                result = cached_result(cache_key, lambda: analyze_image(data))
+            else:
+                cache_key = make_cache_key(upload.digest, "file")
+                result = cached_result(cache_key, lambda: analyze_file(data))
 
         # 🔍 Debug print
         print("\n=== STEGANALYSIS RESULT ===")
@@ -75,6 +74,9 @@ def analyze():
         # still return 200 but include error message
         return jsonify(result), 200
 
+    except RequestEntityTooLarge as e:
+        return jsonify({"error": size_limit_message(getattr(e, "limit", UPLOAD_MAX_SIZE))}), 400
+
     except Exception as e:
 
         print("\n=== STEGANALYSIS ROUTE ERROR ===")
@@ -90,8 +92,5 @@ def analyze():
         # ----------------------------
         # Safe Cleanup
         # ----------------------------
-        if "filepath" in locals() and os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-            except Exception:
-                pass
\ No newline at end of file
+        if "upload" in locals():
+            upload.close()
\ No newline at end of file
@@ -1,11 +1,13 @@
 from flask import Blueprint, request, send_file
 import io
 
-from stego.image.lsb import embed_lsb, extract_lsb
+from stego.image.container import FLAG_BINARY
+from stego.image.encode import encode_png
+from stego.image.lsb import embed_lsb, extract_lsb_bytes
 from stego.image.lsb_keyed import embed_lsb_keyed, extract_lsb_keyed
 from stego.image.normalize import normalize_image
 
-from utils.validators import validate_secret, validate_image_file
+from utils.validators import validate_secret, validate_image_file, validate_payload
 from utils.response import success, error
 
 # 🔥 IMPORTANT: add /api prefix to match frontend
@@ -27,32 +29,38 @@ def embed_image():
         validate_image_file(file)
 
         # -------- Validate form data --------
-        secret = request.form.get("secret")
+        # The secret is either text ("secret") or any file ("payload")
         algorithm = request.form.get("algorithm", "lsb").lower()
         password = request.form.get("password", "")
 
-        validate_secret(secret)
+        if "payload" in request.files:
+            if algorithm != "lsb":
+                return error("Binary payloads are supported with the lsb algorithm only", 400)
 
-        # -------- Normalize image --------
+            secret = request.files["payload"].read()
+            validate_payload(secret)
+        else:
+            secret = request.form.get("secret")
+            validate_secret(secret)
+
+        # -------- Normalize image (decoded once, modified in place) --------
         image = normalize_image(file)
 
         # -------- Algorithm selection --------
         if algorithm == "lsb":
-            stego_image = embed_lsb(image, secret)
+            stego_image = embed_lsb(image, secret, in_place=True)
 
         elif algorithm == "lsb-keyed":
             if not password:
                 return error("Password required for AES-keyed LSB", 400)
 
-            stego_image = embed_lsb_keyed(image, secret, password)
+            stego_image = embed_lsb_keyed(image, secret, password, in_place=True)
 
         else:
             return error("Invalid algorithm", 400)
 
-        # -------- Return PNG output --------
-        buffer = io.BytesIO()
-        stego_image.save(buffer, format="PNG")
-        buffer.seek(0)
+        # -------- Return PNG output (encoded once, streamed) --------
+        buffer = encode_png(stego_image)
 
         return send_file(
             buffer,
@@ -92,7 +100,18 @@ def extract_image():
 
         # -------- Algorithm selection --------
         if algorithm == "lsb":
-            message = extract_lsb(image)
+            payload, flags = extract_lsb_bytes(image)
+
+            # Binary payloads come back as the file itself
+            if payload and flags & FLAG_BINARY:
+                return send_file(
+                    io.BytesIO(payload),
+                    mimetype="application/octet-stream",
+                    as_attachment=True,
+                    download_name="deeptrace_payload.bin"
+                )
+
+            message = payload.decode("utf-8", errors="ignore") if payload else ""
 
         elif algorithm == "lsb-keyed":
             if not password:
@@ -0,0 +1,74 @@
+from functools import cached_property
+
+import numpy as np
+
+from .cooccurrence import build_cooccurrence
+
+# Optional OpenCV import
+try:
+    import cv2
+except Exception:
+    cv2 = None
+
+
+class AnalysisContext:
+    """
+    Per-request cache of the derived arrays shared by the image detectors.
+
+    Every feature is computed lazily on first access and kept for the rest
+    of the analysis, so each full-size intermediate (LSB bits, grayscale
+    plane, co-occurrence matrices) exists at most once per image.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self._derived = {}
+
+    def derived(self, key, compute):
+        """
+        compute() once per analysis and keep the result, for estimators
+        whose full output (not just their score) is reported later.
+        """
+        if key not in self._derived:
+            self._derived[key] = compute()
+        return self._derived[key]
+
+    # ==========================================
+    # Pixel Views
+    # ==========================================
+    @cached_property
+    def gray(self):
+        if len(self.image.shape) == 3:
+            return cv2.cvtColor(self.image, cv2.COLOR_RGB2GRAY)
+        return self.image
+
+    # ==========================================
+    # LSB Plane
+    # ==========================================
+    @cached_property
+    def lsb_bits(self):
+        # reshape() is a zero-copy view for the contiguous arrays cv2 returns
+        return self.image.reshape(-1) & 1
+
+    @cached_property
+    def lsb_ones(self):
+        return int(np.count_nonzero(self.lsb_bits))
+
+    @cached_property
+    def lsb_bytes(self):
+        # Truncate to a multiple of 8 so packbits never pads a partial byte
+        length = (len(self.lsb_bits) // 8) * 8
+        return np.packbits(self.lsb_bits[:length])
+
+    @cached_property
+    def lsb_byte_histogram(self):
+        return np.bincount(self.lsb_bytes, minlength=256)
+
+    # ==========================================
+    # Adjacent-Pixel Co-occurrence
+    # ==========================================
+    @cached_property
+    def cooccurrence(self):
+        # Shared by every pair-based detector (chi-square, histogram,
+        # correlation, SPA); built in one chunked pass
+        return build_cooccurrence(self.image)
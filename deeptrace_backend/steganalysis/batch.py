@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from utils.batch import copy_limited, iter_batch_files, iter_completed
+
+from .image_pipeline import analyze_images
+from .file_pipeline import FILE_MAX_SIZE, analyze_file
+from .result_cache import get_result_cache, make_cache_key
+from .cnn_analysis import CNN_BATCH_SIZE
+
+
+MAX_FILE_SIZE = 20 * 1024 * 1024
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "bmp", "tiff", "webp"}
+
+# Largest upload of either kind
+UPLOAD_MAX_SIZE = max(MAX_FILE_SIZE, FILE_MAX_SIZE)
+
+
+def upload_kind(filename):
+    """Pipeline an upload is routed to by its extension: "image" or "file"."""
+    extension = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+    return "image" if extension in IMAGE_EXTENSIONS else "file"
+
+
+def upload_limit(filename):
+    """Size limit for an upload: MAX_FILE_SIZE for images, FILE_MAX_SIZE otherwise."""
+    return MAX_FILE_SIZE if upload_kind(filename) == "image" else FILE_MAX_SIZE
+
+
+# ==========================================
+# Worker Tasks (run inside the process pool)
+# ==========================================
+def analyze_image_group(file_paths):
+    """One CNN batch worth of images; per-image errors stay per image."""
+    return analyze_images(file_paths)
+
+
+def analyze_file_task(file_path):
+    return analyze_file(file_path)
+
+
+# ==========================================
+# Upload Staging
+# ==========================================
+def stage_batch(files, archive, temp_dir):
+    """
+    Copy every uploaded file (multipart list and/or zip members) into
+    temp_dir, hashing it on the way for the result cache.
+    Returns one entry per file; entries that cannot be staged carry an
+    "error" instead of a "path".
+    """
+    entries = []
+
+    for name, stream in iter_batch_files(files, archive):
+        filename = secure_filename(os.path.basename(name)) or "unnamed"
+        entry = {"filename": name}
+        entries.append(entry)
+
+        if "." not in filename:
+            entry["error"] = "File must have a valid extension"
+            continue
+
+        kind = upload_kind(filename)
+        limit = upload_limit(filename)
+        path = os.path.join(temp_dir, f"{uuid.uuid4().hex}_{filename}")
+
+        sha = hashlib.sha256()
+        try:
+            with open(path, "wb") as dst:
+                copy_limited(stream, _HashingWriter(dst, sha), limit)
+        except ValueError as e:
+            entry["error"] = str(e)
+            continue
+
+        entry["path"] = path
+        entry["kind"] = kind
+        # Batch images are CNN-scored on a centre tile, not the full image,
+        # so their results are kept apart from /analyze's
+        entry["cache_key"] = make_cache_key(sha.hexdigest(), "image-batch" if kind == "image" else kind)
+
+    return entries
+
+
+class _HashingWriter:
+    def __init__(self, dst, sha):
+        self.dst = dst
+        self.sha = sha
+
+    def write(self, chunk):
+        self.sha.update(chunk)
+        self.dst.write(chunk)
+
+
+# ==========================================
+# Streaming Batch Run
+# ==========================================
+def _line(payload):
+    return json.dumps(payload) + "\n"
+
+
+def _iter_tasks(image_entries, file_entries):
+    # Images travel in CNN-batch-sized groups so each worker runs one forward pass
+    for start in range(0, len(image_entries), CNN_BATCH_SIZE):
+        group = image_entries[start:start + CNN_BATCH_SIZE]
+        yield group, analyze_image_group, ([e["path"] for e in group],)
+
+    for entry in file_entries:
+        yield [entry], analyze_file_task, (entry["path"],)
+
+
+def run_batch(entries, temp_dir):
+    """
+    Generator of NDJSON lines: one per file as soon as its result is
+    known (cache hits and staging errors first), then a final summary.
+    Removes temp_dir when finished or abandoned.
+    """
+    started = time.time()
+    cache = get_result_cache()
+    summary = {"total": len(entries), "succeeded": 0, "failed": 0, "cached": 0}
+
+    def ok(entry, result):
+        summary["succeeded"] += 1
+        return _line({"filename": entry["filename"], "status": "ok", "result": result})
+
+    def failed(entry, message):
+        summary["failed"] += 1
+        return _line({"filename": entry["filename"], "status": "error", "error": message})
+
+    try:
+        image_entries, file_entries = [], []
+
+        for entry in entries:
+            if "error" in entry:
+                yield failed(entry, entry["error"])
+                continue
+
+            result = cache.get(entry["cache_key"])
+            if result is not None:
+                summary["cached"] += 1
+                yield ok(entry, result)
+            elif entry["kind"] == "image":
+                image_entries.append(entry)
+            else:
+                file_entries.append(entry)
+
+        for group, results, error in iter_completed(_iter_tasks(image_entries, file_entries)):
+            if error is not None:
+                for entry in group:
+                    yield failed(entry, str(error))
+                continue
+
+            # analyze_image_group returns a list, analyze_file_task a single result
+            if not isinstance(results, list):
+                results = [results]
+
+            for entry, result in zip(group, results):
+                if "error" in result:
+                    yield failed(entry, result["error"])
+                else:
+                    cache.put(entry["cache_key"], result)
+                    yield ok(entry, result)
+
+        summary["elapsed_seconds"] = round(time.time() - started, 3)
+        yield _line({"summary": summary})
+
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def new_batch_dir():
+    return tempfile.mkdtemp(prefix="deeptrace_batch_")
@@ -1,36 +1,30 @@
 import numpy as np
+from scipy.stats import chi2
 
+from .analysis_context import AnalysisContext
 
-def chi_square_score(image):
+
+def chi_square_score(image, context=None):
     """
-    Performs Chi-Square analysis on image pixel pairs.
-    Detects unnatural equalization caused by LSB embedding.
+    Performs Chi-Square analysis on pairs of values (2k, 2k+1).
+    Detects the unnatural equalization of each pair caused by LSB
+    embedding: the score is the p-value (0-100) that the pair counts are
+    equal, so cover images score near 0 and fully embedded ones high.
     """
+    if context is None:
+        context = AnalysisContext(image)
 
-    # Convert to grayscale for statistical consistency
-    gray = np.mean(image, axis=2).astype(np.uint8)
-
-    flat = gray.flatten()
-
-    # Compute histogram
-    hist, _ = np.histogram(flat, bins=256, range=(0, 256))
-
-    chi_square = 0
-
-    # Iterate over pixel pairs (0,1), (2,3), ..., (254,255)
-    for i in range(0, 256, 2):
-        observed_1 = hist[i]
-        observed_2 = hist[i + 1]
-
-        expected = (observed_1 + observed_2) / 2
+    hist = context.cooccurrence.pooled_histogram.astype(np.float64)
 
-        if expected > 0:
-            chi_square += ((observed_1 - expected) ** 2) / expected
-            chi_square += ((observed_2 - expected) ** 2) / expected
+    observed = hist[0::2]
+    expected = (hist[0::2] + hist[1::2]) / 2
 
-    # Normalize chi-square value
-    normalized = min(chi_square / 10000, 1)
+    # Only pairs with enough samples for the chi-square approximation
+    used = expected > 4
+    dof = int(np.count_nonzero(used)) - 1
+    if dof < 1:
+        return 0
 
-    score = int(normalized * 25)
+    chi_square = float(np.sum((observed[used] - expected[used]) ** 2 / expected[used]))
 
-    return score
\ No newline at end of file
+    return int(round(chi2.sf(chi_square, dof) * 100))
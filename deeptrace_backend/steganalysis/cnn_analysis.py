@@ -1,5 +1,8 @@
-import numpy as np
 import os
+import numpy as np
+
+from .analysis_context import AnalysisContext
+from .model_registry import model_registry
 
 try:
     import cv2
@@ -16,6 +19,18 @@ try:
 except ImportError:
     TORCH_AVAILABLE = False
 
+MODEL_PATH = "models/cnn_steg_model.pth"
+
+# Batched inference settings (environment overridable)
+CNN_BATCH_SIZE = int(os.environ.get("STEGANALYSIS_CNN_BATCH_SIZE", 8))
+CNN_NUM_THREADS = int(os.environ.get("STEGANALYSIS_CNN_THREADS", 0))  # 0 = torch default
+CNN_TILE_SIZE = int(os.environ.get("STEGANALYSIS_CNN_TILE", 512))
+
+# Torch's thread count is process-wide, so it is set once per process
+# (the server and every spawned batch worker import this module)
+if TORCH_AVAILABLE and CNN_NUM_THREADS:
+    torch.set_num_threads(CNN_NUM_THREADS)
+
 if TORCH_AVAILABLE:
     class StegCNN(nn.Module):
         """
@@ -54,7 +69,17 @@ if TORCH_AVAILABLE:
             return F.softmax(x, dim=1)
 
 
-def cnn_score(image):
+    def load_cnn_model(path):
+        model = StegCNN()
+        model.load_state_dict(torch.load(path, map_location=torch.device('cpu')))
+        model.eval()
+        return model
+
+
+    model_registry.register("cnn", MODEL_PATH, load_cnn_model)
+
+
+def cnn_score(image, context=None):
     """
     CNN-Based Deep Learning Steganalysis.
     Detects modern steganography (LSB Matching, WOW, HUGO) by pushing 
@@ -66,30 +91,78 @@ def cnn_score(image):
         if not TORCH_AVAILABLE:
             return 0
             
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = image
-            
-        # Normalize and construct tensor [Batch, Channels, Height, Width]
-        image_tensor = torch.tensor(gray, dtype=torch.float32).unsqueeze(0).unsqueeze(0) / 255.0
+        # Resident model shared by all requests in this process
+        model = model_registry.get("cnn")
 
-        model_path = "models/cnn_steg_model.pth"
-        
-        if os.path.exists(model_path):
-            model = StegCNN()
-            model.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')))
-            model.eval()
-            
-            with torch.no_grad():
-                probs = model(image_tensor)
-                # probs[0][1] represents Stego class probability
-                stego_prob = probs[0][1].item()
-                return int(stego_prob * 100)
-        else:
+        if model is None:
             # Fallback / Placeholder when no weights are available
             # To maintain pipeline integrity without throwing errors
             return 0
+
+        if context is None:
+            context = AnalysisContext(image)
+        gray = context.gray
+            
+        # Normalize and construct tensor [Batch, Channels, Height, Width]
+        image_tensor = torch.tensor(gray, dtype=torch.float32).unsqueeze(0).unsqueeze(0) / 255.0
+
+        with torch.no_grad():
+            probs = model(image_tensor)
+            # probs[0][1] represents Stego class probability
+            stego_prob = probs[0][1].item()
+            return int(stego_prob * 100)
             
     except Exception:
         return 0
+
+
+def cnn_tile(gray, size=CNN_TILE_SIZE):
+    """
+    Bring a grayscale plane to the common (size, size) batch shape.
+    Takes the centre tile rather than resizing, since interpolation would
+    smooth away the pixel-level noise the network looks for. Smaller
+    images are mirror-padded.
+    """
+    h, w = gray.shape[:2]
+
+    pad_h = max(size - h, 0)
+    pad_w = max(size - w, 0)
+    if pad_h or pad_w:
+        gray = np.pad(gray, ((pad_h // 2, pad_h - pad_h // 2), (pad_w // 2, pad_w - pad_w // 2)), mode="symmetric")
+        h, w = gray.shape[:2]
+
+    top = (h - size) // 2
+    left = (w - size) // 2
+    return np.ascontiguousarray(gray[top:top + size, left:left + size])
+
+
+def cnn_scores(tiles, batch_size=CNN_BATCH_SIZE):
+    """
+    Batched CNN inference over tiles produced by cnn_tile().
+    Runs one StegCNN forward pass per batch of `batch_size` tiles and
+    returns one 0-100 stego score per tile, in input order.
+    """
+    scores = [0] * len(tiles)
+
+    try:
+        if not TORCH_AVAILABLE or not tiles:
+            return scores
+
+        model = model_registry.get("cnn")
+        if model is None:
+            return scores
+
+        with torch.inference_mode():
+            for start in range(0, len(tiles), batch_size):
+                batch = np.stack(tiles[start:start + batch_size])
+
+                # [Batch, Channels, Height, Width], normalized to 0-1
+                batch_tensor = torch.from_numpy(batch).unsqueeze(1).float().div_(255.0)
+
+                probs = model(batch_tensor)[:, 1].tolist()
+                scores[start:start + len(probs)] = [int(p * 100) for p in probs]
+
+        return scores
+
+    except Exception:
+        return scores
@@ -1,70 +1,196 @@
 import string
 import re
 
+import numpy as np
+
+
+# ==========================================
+# Byte Class Tables
+# ==========================================
+# Built once; every check below is a table lookup over the raw bytes.
+
+def _byte_table(chars):
+    table = np.zeros(256, dtype=bool)
+    table[np.frombuffer(chars.encode("ascii"), dtype=np.uint8)] = True
+    return table
+
+
+# Standard printable characters (all ASCII, so one byte == one character)
+VALID_BYTES = _byte_table(string.ascii_letters + string.digits + string.punctuation + " \t\n\r")
+PUNCTUATION_BYTES = _byte_table(string.punctuation)
+HEX_BYTES = _byte_table(string.hexdigits)
+BASE64_BYTES = _byte_table(string.ascii_letters + string.digits + "+/")
+EQUALS_BYTES = _byte_table("=")
+
+# Separators of str.split() within ASCII
+SPACE_BYTES = _byte_table(" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+
+# Bytes that may be removed by .strip('\x00').strip() at either end:
+# nulls, whitespace and anything non-ASCII (Unicode whitespace or bytes
+# dropped by the lenient UTF-8 decode)
+EDGE_BYTES = SPACE_BYTES.copy()
+EDGE_BYTES[0] = True
+EDGE_BYTES[0x80:] = True
+
+# Magic headers of common file types carried as binary payloads
+FILE_SIGNATURES = (
+    (b"PK\x03\x04", "ZIP"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"%PDF-", "PDF"),
+    (b"\x1f\x8b\x08", "GZIP"),
+)
+
+PLAINTEXT_MIN_RATIO = 0.95
+CIPHER_MIN_RATIO = 0.90
+CIPHER_MIN_WORD = 16
+
+_BASE64_PATTERN = re.compile(r'^[A-Za-z0-9+/]+={0,2}$')
+
+
 def is_valid_base64_or_hex(text):
     """Check if the string strongly represents a base64 encoded payload or HEX string."""
     text = text.strip()
-    
+
     # Must be reasonably long to be considered a deliberate stego ciphertext
-    if len(text) < 16:
+    if len(text) < CIPHER_MIN_WORD:
         return False
-        
+
     # Check Hex
     if all(c in string.hexdigits for c in text):
         return True
-        
+
     # Check Base64 (Length multiple of 4, standard chars, optional padding)
-    b64_pattern = r'^[A-Za-z0-9+/]+={0,2}$'
-    if len(text) % 4 == 0 and re.match(b64_pattern, text):
+    if len(text) % 4 == 0 and _BASE64_PATTERN.match(text):
         return True
-        
+
     return False
 
+
+def detect_file_signature(byte_data):
+    """Name of the file type whose magic header starts byte_data, or None."""
+    for magic, name in FILE_SIGNATURES:
+        if byte_data[:len(magic)] == magic:
+            return name
+    return None
+
+
+def _edge_run(mask):
+    # Length of the leading run of True values
+    stop = np.flatnonzero(~mask)
+    return int(stop[0]) if stop.size else len(mask)
+
+
+def _could_be_text(data):
+    """
+    Cheap upper bound on the printable ratio, before any decode. Every
+    valid character is one ASCII byte, and every ASCII byte outside the
+    strippable edges survives as one character, so valid / inner ASCII
+    can only overestimate the real ratio.
+    """
+    valid = int(np.count_nonzero(VALID_BYTES[data]))
+    ascii_bytes = int(np.count_nonzero(data < 0x80))
+
+    edges = EDGE_BYTES[data]
+    lead = _edge_run(edges)
+    trail = _edge_run(edges[::-1]) if lead < len(data) else 0
+    edge_ascii = int(np.count_nonzero(data[:lead] < 0x80)) + int(np.count_nonzero(data[len(data) - trail:] < 0x80))
+
+    inner_ascii = ascii_bytes - edge_ascii
+    return inner_ascii <= 0 or valid > CIPHER_MIN_RATIO * inner_ascii
+
+
+def _has_cipher_word(encoded):
+    """
+    Whether any whitespace-separated word of an ASCII text is a base64 or
+    hex block, checked for all words at once from the byte classes.
+    """
+    word = ~SPACE_BYTES[encoded]
+    edges = np.diff(np.concatenate(([0], word.view(np.int8), [0])))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    lengths = stops - starts
+
+    long_enough = lengths >= CIPHER_MIN_WORD
+    if not long_enough.any():
+        return False
+    starts, stops, lengths = starts[long_enough], stops[long_enough], lengths[long_enough]
+
+    def run_count(table):
+        cumulative = np.concatenate(([0], np.cumsum(table[encoded])))
+        return cumulative, cumulative[stops] - cumulative[starts]
+
+    _, hex_count = run_count(HEX_BYTES)
+    if (hex_count == lengths).any():
+        return True
+
+    # Base64: alphabet characters then at most two trailing '='
+    _, b64_count = run_count(BASE64_BYTES)
+    eq_cumulative, eq_count = run_count(EQUALS_BYTES)
+    trailing_eq = eq_cumulative[stops] - eq_cumulative[stops - eq_count]
+    base64 = (
+        (lengths % 4 == 0) & (eq_count <= 2) & (trailing_eq == eq_count) &
+        (b64_count + eq_count == lengths) & (b64_count > 0)
+    )
+    return bool(base64.any())
+
+
 def validate_content(byte_data):
     """
     Validates whether extracted byte data is meaningful.
-    Categorizes it into "plaintext", "cipher text", or "nothing found".
-    Returns (result_type, decoded_text)
+    Categorizes it into "plaintext", "cipher text", "embedded file" or
+    "nothing found".
+    Returns (result_type, decoded_text); for an embedded file the text
+    describes the file.
     """
 
     if not byte_data:
         return "nothing found", None
 
-    try:
-        decoded = byte_data.decode("utf-8", errors="ignore")
-    except:
+    # Binary payloads of a known file type are reported, not decoded
+    file_type = detect_file_signature(byte_data)
+    if file_type is not None:
+        return "embedded file", f"{file_type} file ({len(byte_data)} bytes)"
+
+    # Reject most binary payloads from the byte classes alone
+    data = np.frombuffer(byte_data, dtype=np.uint8)
+    if not _could_be_text(data):
         return "nothing found", None
 
+    decoded = byte_data.decode("utf-8", errors="ignore")
+
     # Strip nulls and whitespace
     clean_text = decoded.strip('\x00').strip()
 
     if len(clean_text) < 5:
         return "nothing found", None
 
-    # Count standard printable characters
-    valid_chars = set(string.ascii_letters + string.digits + string.punctuation + " \t\n\r")
-    printable_count = sum(1 for c in clean_text if c in valid_chars)
+    # Count standard printable characters (ASCII: one byte each)
+    encoded = np.frombuffer(clean_text.encode("utf-8"), dtype=np.uint8)
+    printable_count = int(np.count_nonzero(VALID_BYTES[encoded]))
     printable_ratio = printable_count / max(len(clean_text), 1)
 
     # ---------------------------------------------------------
     # 1. Plaintext Check (Very Strict)
     # ---------------------------------------------------------
     # Must be 95%+ standard printable characters and not repeating garbage
-    if printable_ratio > 0.95:
+    if printable_ratio > PLAINTEXT_MIN_RATIO:
         # Reject if it's just repeating punctuation like $$$$$ or %%%%%
-        punctuation_ratio = sum(1 for c in clean_text if c in string.punctuation) / max(len(clean_text), 1)
+        punctuation_ratio = int(np.count_nonzero(PUNCTUATION_BYTES[encoded])) / max(len(clean_text), 1)
         if punctuation_ratio < 0.3:
             return "plaintext", clean_text
 
     # ---------------------------------------------------------
-    # 2. Ciphertext Check 
+    # 2. Ciphertext Check
     # ---------------------------------------------------------
     # Must be >90% printable, but tightly match known cipher structures
-    if printable_ratio > 0.90:
+    if printable_ratio > CIPHER_MIN_RATIO:
         # Try to find a continuous block of base64 or hex
-        words = clean_text.split()
-        for word in words:
-            if is_valid_base64_or_hex(word):
-                return "cipher text", clean_text
+        if clean_text.isascii():
+            found = _has_cipher_word(encoded)
+        else:
+            # Unicode whitespace also splits words; rare enough for the slow path
+            found = any(is_valid_base64_or_hex(word) for word in clean_text.split())
+        if found:
+            return "cipher text", clean_text
 
-    return "nothing found", None
\ No newline at end of file
+    return "nothing found", None
@@ -0,0 +1,125 @@
+import numpy as np
+
+# Optional OpenCV import
+try:
+    import cv2
+except Exception:
+    cv2 = None
+
+
+# Rows processed per step; bounds the per-chunk buffers to a few rows of
+# the image regardless of its height
+COOCCURRENCE_CHUNK_ROWS = 256
+
+# cv2.calcHist counts in float32, exact up to 2^24 per bin; chunks are
+# kept below that many pairs
+_EXACT_FLOAT32 = 1 << 24
+
+_LEVELS = np.arange(256, dtype=np.float64)
+
+
+class Cooccurrence:
+    """
+    Adjacent-pixel statistics of an image, gathered in one chunked pass.
+
+    - horizontal[c, a, b]: pixels of channel c with value a whose right
+      neighbour is b
+    - vertical[c, a, b]: same for the neighbour below
+    - histogram[c, v]: samples of channel c with value v
+
+    Every pair-based detector works on these small (C, 256, 256) arrays,
+    so its cost no longer depends on the image size.
+    """
+
+    def __init__(self, horizontal, vertical, histogram):
+        self.horizontal = horizontal
+        self.vertical = vertical
+        self.histogram = histogram
+
+    @property
+    def channels(self):
+        return self.histogram.shape[0]
+
+    @property
+    def pooled_histogram(self):
+        return self.histogram.sum(axis=0)
+
+    def pairs(self, channel=None):
+        """Horizontal + vertical pair counts, for one channel or all pooled."""
+        if channel is None:
+            return self.horizontal.sum(axis=0) + self.vertical.sum(axis=0)
+        return self.horizontal[channel] + self.vertical[channel]
+
+
+def _pair_counts(first, second):
+    """256x256 counts of (first, second) value pairs of two same-shape uint8 arrays."""
+    if cv2 is not None:
+        counts = cv2.calcHist([first, second], [0, 1], None, [256, 256], [0, 256, 0, 256])
+        return counts.astype(np.int64).reshape(-1)
+
+    # Pair index a * 256 + b
+    index = first.astype(np.int32) << 8
+    index |= second
+    return np.bincount(index.reshape(-1), minlength=65536)
+
+
+def build_cooccurrence(image, chunk_rows=COOCCURRENCE_CHUNK_ROWS):
+    """
+    Histogram and horizontal/vertical co-occurrence matrices of a uint8
+    image (H, W) or (H, W, C), counted over row chunks (cv2.calcHist when
+    OpenCV is available, np.bincount otherwise). Each chunk carries one
+    extra row so vertical pairs across chunk boundaries are counted
+    exactly once; the histogram is the horizontal row sums plus the last
+    column.
+    """
+    if image.ndim == 2:
+        image = image[:, :, None]
+
+    height, width, channels = image.shape
+    horizontal = np.zeros((channels, 256 * 256), dtype=np.int64)
+    vertical = np.zeros((channels, 256 * 256), dtype=np.int64)
+    histogram = np.zeros((channels, 256), dtype=np.int64)
+
+    chunk_rows = max(min(chunk_rows, _EXACT_FLOAT32 // max(width, 1) - 1), 1)
+
+    for start in range(0, height, chunk_rows):
+        stop = min(start + chunk_rows, height)
+        # One row of overlap for the vertical pairs into the next chunk
+        block = image[start:min(stop + 1, height)]
+        rows = stop - start
+
+        for c in range(channels):
+            plane = block[:, :, c]
+
+            if width > 1:
+                horizontal[c] += _pair_counts(plane[:rows, :-1], plane[:rows, 1:])
+            if len(plane) > 1:
+                vertical[c] += _pair_counts(plane[:-1], plane[1:])
+
+            histogram[c] += np.bincount(plane[:rows, -1], minlength=256)
+
+    horizontal = horizontal.reshape(channels, 256, 256)
+    histogram += horizontal.sum(axis=2)
+
+    return Cooccurrence(horizontal, vertical.reshape(channels, 256, 256), histogram)
+
+
+# ==========================================
+# Derived Statistics (O(1) in the image size)
+# ==========================================
+def pair_correlation(matrix):
+    """Pearson correlation between the two members of the counted pairs."""
+    total = matrix.sum()
+    if total == 0:
+        return 0.0
+
+    p = matrix / total
+    px, py = p.sum(axis=1), p.sum(axis=0)
+    mx, my = px @ _LEVELS, py @ _LEVELS
+    vx = px @ _LEVELS ** 2 - mx ** 2
+    vy = py @ _LEVELS ** 2 - my ** 2
+    if vx <= 0 or vy <= 0:
+        return 0.0
+
+    cov = _LEVELS @ p @ _LEVELS - mx * my
+    return float(cov / np.sqrt(vx * vy))
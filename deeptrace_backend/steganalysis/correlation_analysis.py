@@ -1,17 +1,18 @@
-import numpy as np
+from .analysis_context import AnalysisContext
+from .cooccurrence import pair_correlation
 
 
-def correlation_score(image):
-    gray = np.mean(image, axis=2)
+def correlation_score(image, context=None):
+    """
+    Neighbouring-pixel correlation (horizontal pairs of every channel).
+    Noise-like content decorrelates neighbours; 0-100, higher means less
+    correlated.
+    """
+    if context is None:
+        context = AnalysisContext(image)
 
-    right_shift = np.roll(gray, -1, axis=1)
+    correlation = pair_correlation(context.cooccurrence.horizontal.sum(axis=0))
 
-    correlation = np.corrcoef(
-        gray.flatten(), right_shift.flatten()
-    )[0, 1]
+    score = int((1 - correlation) * 100)
 
-    correlation = 0 if np.isnan(correlation) else correlation
-
-    score = int((1 - correlation) * 25)
-
-    return max(min(score, 25), 0)
\ No newline at end of file
+    return max(min(score, 100), 0)
@@ -1,24 +1,21 @@
 import numpy as np
 from scipy.stats import entropy
 
+from .analysis_context import AnalysisContext
 
-def entropy_score(image):
+
+def entropy_score(image, context=None):
     # Shannon entropy calculation: H(X) = −Σ p(x) log₂ p(x)
     
-    # We calculate the entropy of the LSB plane specifically, as it's more sensitive
-    flat = image.flatten()
-    lsb_bits = flat & 1
-    
-    # Pack bits into bytes for entropy calculation
-    # Just grab chunks of 8 bits and calculate entropy
-    # To avoid shape errors, we truncate to a multiple of 8
-    length = (len(lsb_bits) // 8) * 8
-    if length == 0:
+    if context is None:
+        context = AnalysisContext(image)
+
+    # We calculate the entropy of the LSB plane specifically, as it's more sensitive.
+    # The context packs it into bytes once (truncated to a multiple of 8 bits)
+    if len(context.lsb_bytes) == 0:
         return 0
         
-    byte_array = np.packbits(lsb_bits[:length])
-    
-    hist, _ = np.histogram(byte_array, bins=256, range=(0, 255))
+    hist = context.lsb_byte_histogram
     prob = hist / np.sum(hist)
     
     ent = entropy(prob, base=2)
@@ -0,0 +1,193 @@
+import numpy as np
+from scipy.stats import chi2
+
+
+# ==========================================
+# Window Geometry
+# ==========================================
+BLOCK_SIZE = 1024                   # window step; histograms are kept per block
+WINDOW_BLOCKS = 4                   # window = 4 blocks = 4096 bytes
+WINDOW_SIZE = BLOCK_SIZE * WINDOW_BLOCKS
+
+# A window looks encrypted/random when its byte entropy is near the 8-bit
+# maximum AND its histogram is statistically indistinguishable from uniform
+# (chi-square below the 0.1% critical value for 255 degrees of freedom)
+HIGH_ENTROPY_BITS = 7.9
+CHI_SQUARE_LIMIT = float(chi2.isf(0.001, 255))
+
+MAX_REPORTED_REGIONS = 20
+
+# n * log2(n) for every possible bin count, so window entropies need a
+# table gather instead of a log per bin
+_N_LOG_N = np.zeros(WINDOW_SIZE + 1, dtype=np.float64)
+_N_LOG_N[1:] = np.arange(1, WINDOW_SIZE + 1) * np.log2(np.arange(1, WINDOW_SIZE + 1))
+
+
+# ==========================================
+# Streaming Rolling-Histogram Profiler
+# ==========================================
+class EntropyProfiler:
+    """
+    Sliding-window entropy and chi-square profile of a byte stream.
+
+    Chunks are fed in order through update(). Each chunk is split into
+    BLOCK_SIZE blocks whose histograms come from a single bincount; a
+    window's histogram is the difference of two cumulative block sums,
+    so the whole profile stays linear in the input size. Only the last
+    WINDOW_BLOCKS - 1 block histograms are carried between chunks.
+    """
+
+    def __init__(self):
+        self._carry_hist = np.zeros((0, 256), dtype=np.int64)
+        self._carry_len = np.zeros(0, dtype=np.int64)
+        self._offset = 0    # byte offset of the first carried block
+
+        self._starts = []
+        self._lengths = []
+        self._entropy = []
+        self._chi_square = []
+
+    def update(self, chunk):
+        """
+        Add the next chunk (uint8 array). Chunks other than the last must
+        be a multiple of BLOCK_SIZE long. Returns the chunk's byte
+        histogram, so callers need not count the bytes a second time.
+        """
+        chunk_hists, chunk_lengths = _block_histograms(chunk)
+
+        hists = np.concatenate([self._carry_hist, chunk_hists])
+        lengths = np.concatenate([self._carry_len, chunk_lengths])
+
+        if len(hists) >= WINDOW_BLOCKS:
+            self._add_windows(hists, lengths)
+
+        # Keep the blocks the next chunk's first windows still need
+        drop = max(len(hists) - (WINDOW_BLOCKS - 1), 0)
+        self._offset += int(lengths[:drop].sum())
+        self._carry_hist = hists[drop:]
+        self._carry_len = lengths[drop:]
+
+        return chunk_hists.sum(axis=0)
+
+    def _add_windows(self, hists, lengths):
+        cum_hist = np.concatenate([np.zeros((1, 256), dtype=np.int64), np.cumsum(hists, axis=0)])
+        cum_len = np.concatenate([[0], np.cumsum(lengths)])
+
+        window_hist = cum_hist[WINDOW_BLOCKS:] - cum_hist[:-WINDOW_BLOCKS]
+        window_len = cum_len[WINDOW_BLOCKS:] - cum_len[:-WINDOW_BLOCKS]
+
+        self._starts.append(self._offset + cum_len[:-WINDOW_BLOCKS])
+        self._lengths.append(window_len)
+        self._entropy.append(_entropy_bits(window_hist, window_len))
+        self._chi_square.append(_chi_square(window_hist, window_len))
+
+    def finish(self):
+        """Summary of the profile, with flagged windows merged into regions."""
+        if not self._starts:
+            return {
+                "window_size": WINDOW_SIZE,
+                "step": BLOCK_SIZE,
+                "window_count": 0,
+                "high_entropy_fraction": 0.0,
+                "median_entropy": None,
+                "regions": []
+            }
+
+        starts = np.concatenate(self._starts)
+        lengths = np.concatenate(self._lengths)
+        ent = np.concatenate(self._entropy)
+        chi = np.concatenate(self._chi_square)
+
+        flagged = (ent >= HIGH_ENTROPY_BITS) & (chi < CHI_SQUARE_LIMIT)
+
+        return {
+            "window_size": WINDOW_SIZE,
+            "step": BLOCK_SIZE,
+            "window_count": int(len(ent)),
+            "high_entropy_fraction": round(float(flagged.mean()), 4),
+            "median_entropy": round(float(np.median(ent)), 4),
+            "regions": _merge_regions(flagged, starts, lengths, ent, chi)
+        }
+
+
+# ==========================================
+# Vectorized Helpers
+# ==========================================
+def _block_histograms(chunk):
+    """(n_blocks, 256) histograms and block lengths from one bincount."""
+    n_full = len(chunk) // BLOCK_SIZE
+    tail = len(chunk) - n_full * BLOCK_SIZE
+    n_blocks = n_full + (1 if tail else 0)
+
+    # Offset every byte by 256 * its block index so one bincount
+    # produces all block histograms at once
+    keys = chunk.astype(np.int32)
+    keys += np.repeat(np.arange(n_blocks, dtype=np.int32) * 256, BLOCK_SIZE)[:len(chunk)]
+
+    hists = np.bincount(keys, minlength=n_blocks * 256).reshape(n_blocks, 256).astype(np.int64)
+
+    lengths = np.full(n_blocks, BLOCK_SIZE, dtype=np.int64)
+    if tail:
+        lengths[-1] = tail
+
+    return hists, lengths
+
+
+def _entropy_bits(hists, lengths):
+    # H = log2(n) - sum(c * log2(c)) / n for bin counts c summing to n
+    return (np.log2(lengths) - _N_LOG_N[hists].sum(axis=1) / lengths).astype(np.float32)
+
+
+def _chi_square(hists, lengths):
+    # sum((c - e)^2 / e) with e = n / 256 simplifies to sum(c^2) / e - n
+    expected = lengths / 256.0
+    return (np.einsum("ij,ij->i", hists, hists) / expected - lengths).astype(np.float32)
+
+
+def _merge_regions(flagged, starts, lengths, ent, chi):
+    """Runs of consecutive flagged windows as byte ranges, largest first."""
+    if not flagged.any():
+        return []
+
+    edges = np.diff(np.concatenate([[0], flagged.astype(np.int8), [0]]))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)      # exclusive window index
+
+    offsets = starts[run_starts]
+    sizes = starts[run_ends - 1] + lengths[run_ends - 1] - offsets
+
+    # Per-run means from cumulative sums; only the reported runs become dicts
+    cum_ent = np.concatenate([[0.0], np.cumsum(ent, dtype=np.float64)])
+    cum_chi = np.concatenate([[0.0], np.cumsum(chi, dtype=np.float64)])
+    counts = run_ends - run_starts
+
+    top = np.argsort(-sizes, kind="stable")[:MAX_REPORTED_REGIONS]
+
+    return [
+        {
+            "offset": int(offsets[i]),
+            "length": int(sizes[i]),
+            "mean_entropy": round(float((cum_ent[run_ends[i]] - cum_ent[run_starts[i]]) / counts[i]), 4),
+            "mean_chi_square": round(float((cum_chi[run_ends[i]] - cum_chi[run_starts[i]]) / counts[i]), 2)
+        }
+        for i in top
+    ]
+
+
+# ==========================================
+# Localized Anomaly Score
+# ==========================================
+def localized_entropy_score(profile):
+    """
+    0-25 score for random-looking regions that stand out from the rest of
+    the file: the entropy contrast between the strongest region and the
+    file's median window. A file that is random throughout (an archive or
+    encrypted container) has no contrast; the global entropy score
+    already covers it.
+    """
+    if not profile["regions"]:
+        return 0
+
+    contrast = max(r["mean_entropy"] for r in profile["regions"]) - profile["median_entropy"]
+
+    return int(min(max(contrast, 0) / 4, 1) * 25)
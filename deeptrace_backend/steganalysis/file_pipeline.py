@@ -1,25 +1,83 @@
+import mmap
 import os
+from contextlib import contextmanager
+
 import numpy as np
 from scipy.stats import entropy
 
 from .scoring_engine import aggregate_file_scores
+from .entropy_profile import EntropyProfiler, localized_entropy_score
 
 
 # ==========================================
-# Helper: Read file as binary
+# Configuration (environment overridable)
+# ==========================================
+# Non-image files are scanned in constant memory, so they may be far
+# larger than the 20MB image limit (disk images, archives)
+FILE_MAX_SIZE = int(os.environ.get("STEGANALYSIS_FILE_MAX_SIZE", 512 * 1024 * 1024))
+
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024     # a multiple of the entropy profile block size
+
+
 # ==========================================
-def read_binary(file_path):
+# Helper: Map file into memory
+# ==========================================
+@contextmanager
+def map_binary(file_path):
+    """Read-only memory map of a file (b"" for an empty one)."""
     with open(file_path, "rb") as f:
-        return f.read()
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            yield mapped
+        finally:
+            mapped.close()
 
 
 # ==========================================
-# 1️⃣ Byte-Level Entropy Analysis
+# Single Pass: Byte Histogram
 # ==========================================
-def file_entropy_score(data):
-    byte_array = np.frombuffer(data, dtype=np.uint8)
+def byte_histogram(data, chunk_size=SCAN_CHUNK_SIZE, progress=None, profiler=None):
+    """
+    Byte-value histogram of a bytes-like object or mmap, built chunk by
+    chunk so memory stays constant. Pages of an mmap are dropped once
+    counted, so the worker's RSS does not grow with the file size.
+    Entropy and LSB balance are both derived from this one histogram.
+    An EntropyProfiler, if given, sees every chunk in the same pass.
+    """
+    hist = np.zeros(256, dtype=np.int64)
+    view = memoryview(data)
+    size = len(view)
+    release = isinstance(data, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED")
+
+    try:
+        for start in range(0, size, chunk_size):
+            chunk = np.frombuffer(view[start:start + chunk_size], dtype=np.uint8)
+            if profiler is not None:
+                hist += profiler.update(chunk)
+            else:
+                hist += np.bincount(chunk, minlength=256)
+            del chunk
+
+            if release:
+                data.madvise(mmap.MADV_DONTNEED, start, min(chunk_size, size - start))
+            if progress is not None:
+                progress(min(start + chunk_size, size) / size, "scan")
+    finally:
+        view.release()
+
+    return hist
+
 
-    hist, _ = np.histogram(byte_array, bins=256, range=(0, 256))
+# ==========================================
+# 1️⃣ Byte-Level Entropy Analysis
+# ==========================================
+def file_entropy_score(hist):
     total = np.sum(hist)
 
     if total == 0:
@@ -37,15 +95,10 @@ def file_entropy_score(data):
 # ==========================================
 # 2️⃣ Bit Distribution (LSB Bias)
 # ==========================================
-def bit_distribution_score(data):
-    byte_array = np.frombuffer(data, dtype=np.uint8)
-
-    if len(byte_array) == 0:
-        return 0
-
-    lsb_bits = byte_array & 1
-    zeros = np.sum(lsb_bits == 0)
-    ones = np.sum(lsb_bits == 1)
+def bit_distribution_score(hist):
+    # Even byte values have LSB 0, odd ones LSB 1
+    zeros = int(np.sum(hist[0::2]))
+    ones = int(np.sum(hist[1::2]))
 
     total = zeros + ones
     if total == 0:
@@ -61,8 +114,7 @@ def bit_distribution_score(data):
 # ==========================================
 # 3️⃣ File Size Anomaly
 # ==========================================
-def file_size_score(file_path):
-    size = os.path.getsize(file_path)
+def file_size_score(size):
 
     # Normalize size suspicion (5MB threshold)
     normalized = min(size / (5 * 1024 * 1024), 1)
@@ -81,7 +133,7 @@ def header_score(data):
         b"PK\x03\x04": "zip",
     }
 
-    header = data[:8]
+    header = bytes(data[:8])
 
     for sig in signatures:
         if header.startswith(sig):
@@ -93,14 +145,28 @@ def header_score(data):
 # ==========================================
 # Main File Analysis Function
 # ==========================================
-def analyze_file(file_path):
+def analyze_file(source, progress=None):
+    """
+    source is a file path (memory-mapped) or an in-memory bytes-like
+    buffer. Every metric comes from one chunked pass over the bytes.
+    """
+
+    if isinstance(source, (str, os.PathLike)):
+        with map_binary(source) as data:
+            return analyze_file(data, progress=progress)
 
-    data = read_binary(file_path)
+    def scan_progress(fraction, stage):
+        progress(0.9 * fraction, stage)
 
-    entropy_score_val = file_entropy_score(data)
-    bit_score_val = bit_distribution_score(data)
-    size_score_val = file_size_score(file_path)
-    header_score_val = header_score(data)
+    profiler = EntropyProfiler()
+    hist = byte_histogram(source, progress=scan_progress if progress is not None else None, profiler=profiler)
+    profile = profiler.finish()
+
+    entropy_score_val = file_entropy_score(hist)
+    bit_score_val = bit_distribution_score(hist)
+    size_score_val = file_size_score(len(source))
+    header_score_val = header_score(source)
+    localized_score_val = localized_entropy_score(profile)
 
     # IMPORTANT: Pass 0 for chi_square (image-only metric)
     result = aggregate_file_scores(
@@ -108,9 +174,15 @@ def analyze_file(file_path):
         entropy_score_val,
         size_score_val,
         header_score_val,
-        0   # chi_square placeholder
+        0,  # chi_square placeholder
+        localized_score_val
     )
 
+    # Where in the file the random-looking (encrypted/compressed) data sits
+    result["entropy_profile"] = profile
+    if progress is not None:
+        progress(1.0, "scoring")
+
     # File pipeline does not currently extract content directly via validate_content in the snippet seen earlier, 
     # but we will double check its logic.
     return result
\ No newline at end of file
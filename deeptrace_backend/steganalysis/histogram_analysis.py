@@ -1,16 +1,23 @@
 import numpy as np
 
+from .analysis_context import AnalysisContext
 
-def histogram_score(image):
-    flat = image.flatten()
 
-    hist, _ = np.histogram(flat, bins=256, range=(0, 255))
+def histogram_score(image, context=None):
+    """
+    Histogram pair-flattening: LSB embedding pulls each pair of bins
+    (2k, 2k+1) towards equal counts while the steps between pairs stay.
+    Compares the within-pair steps to the between-pair steps; 0-100.
+    """
+    if context is None:
+        context = AnalysisContext(image)
 
-    diff = np.abs(np.diff(hist))
-    anomaly = np.mean(diff)
+    hist = context.cooccurrence.pooled_histogram.astype(np.float64)
 
-    normalized = min(anomaly / 1000, 1)
+    within = np.abs(hist[0::2] - hist[1::2]).sum()
+    between = np.abs(hist[1:-1:2] - hist[2::2]).sum()
 
-    score = int(normalized * 25)
+    if between == 0:
+        return 0
 
-    return score
\ No newline at end of file
+    return int(min(max(1 - within / between, 0), 1) * 100)
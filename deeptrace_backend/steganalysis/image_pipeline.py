@@ -1,3 +1,4 @@
+import os
 import numpy as np
 
 # Optional OpenCV import
@@ -6,25 +7,38 @@ try:
 except Exception:
     cv2 = None
 
+from .analysis_context import AnalysisContext
 from .lsb_analysis import lsb_score
 from .entropy_analysis import entropy_score
 from .lsb_extraction import extract_lsb_payload
 from .content_validator import validate_content
 from .scoring_engine import aggregate_image_scores
-from .rs_analysis import rs_score
-from .spa_analysis import spa_score
+from .rs_analysis import rs_score, rs_estimate
+from .spa_analysis import spa_score, spa_estimate
+from .chi_square_analysis import chi_square_score
+from .histogram_analysis import histogram_score
+from .correlation_analysis import correlation_score
 from .srm_analysis import srm_score
-from .cnn_analysis import cnn_score
+from .cnn_analysis import cnn_score, cnn_tile, cnn_scores, CNN_BATCH_SIZE
 
 
 # ==========================================
 # Normalize Image to RGB
 # ==========================================
-def load_and_normalize_image(file_path):
+def load_and_normalize_image(source):
+    """
+    source is a file path, or a bytes-like buffer holding the encoded
+    image (decoded in place with cv2.imdecode, no temp file needed).
+    """
     if cv2 is None:
         raise RuntimeError("OpenCV (cv2) is not available in this environment. Steganalysis is disabled on Vercel Serverless.")
 
-    image = cv2.imread(file_path, cv2.IMREAD_UNCHANGED)
+    if isinstance(source, (str, os.PathLike)):
+        image = cv2.imread(source, cv2.IMREAD_UNCHANGED)
+    else:
+        encoded = np.frombuffer(source, dtype=np.uint8)
+        image = cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED) if encoded.size else None
+        del encoded
 
     if image is None:
         raise ValueError("Invalid or unsupported image format")
@@ -42,21 +56,47 @@ def load_and_normalize_image(file_path):
 
 
 # ==========================================
-# Main Image Analysis
+# Detector Stages
 # ==========================================
-def analyze_image(file_path):
-
-    image = load_and_normalize_image(file_path)
-
+DETECTOR_STAGES = (
     # Statistical Scores (0-100)
-    lsb_anomaly = lsb_score(image)
-    entropy_dev = entropy_score(image)
-    rs_anomaly = rs_score(image)
-    spa_anomaly = spa_score(image)
+    ("lsb_anomaly", lsb_score),
+    ("entropy_deviation", entropy_score),
+    ("rs_anomaly", rs_score),
+    ("spa_anomaly", spa_score),
+
+    # Pair statistics (0-100), derived from the shared co-occurrence matrices
+    ("chi_square", chi_square_score),
+    ("histogram", histogram_score),
+    ("correlation", correlation_score),
 
     # Advanced Detection Layers (0-100 placeholder/ML scores)
-    srm_anomaly = srm_score(image)
-    cnn_anomaly = cnn_score(image)
+    ("srm_anomaly", srm_score),
+)
+
+
+def _report(progress, fraction, stage):
+    if progress is not None:
+        progress(fraction, stage)
+
+
+def _image_findings(image, context, progress=None):
+    """
+    Runs every detector except the CNN layer, which is scored separately
+    so batch mode can run it once per group of images.
+    progress(fraction, stage), if given, is called after each stage.
+    """
+    findings = {}
+
+    for i, (name, detector) in enumerate(DETECTOR_STAGES):
+        findings[name] = detector(image, context=context)
+        _report(progress, 0.1 + 0.6 * (i + 1) / len(DETECTOR_STAGES), name)
+
+    # Full estimator outputs behind the scores (already cached on the context)
+    findings["payload_estimates"] = {
+        "rs": rs_estimate(image, context),
+        "spa": spa_estimate(image, context)
+    }
 
     # --------------------------------------
     # LSB Extraction Attempt (ALWAYS RUN)
@@ -66,7 +106,9 @@ def analyze_image(file_path):
     valid_content = False
     extracted_text = None
     extraction_type = None
+    extraction_strategy = None
 
+    # Lazy: strategies after the first valid payload are never read
     payload_results = extract_lsb_payload(image)
     
     for p in payload_results:
@@ -78,31 +120,117 @@ def analyze_image(file_path):
             
         content_type, decoded = validate_content(byte_data)
         
-        if content_type in ("plaintext", "cipher text"):
+        if content_type in ("plaintext", "cipher text", "embedded file"):
             extraction_success = True
             valid_content = True
             extracted_text = decoded
             extraction_type = content_type
+            extraction_strategy = p["strategy"]
             break
 
+    findings.update(
+        extraction_success=extraction_success,
+        valid_content=valid_content,
+        extracted_text=extracted_text,
+        extraction_type=extraction_type,
+        extraction_strategy=extraction_strategy
+    )
+    _report(progress, 0.8, "lsb_extraction")
+
+    return findings
+
+
+def _build_result(findings, cnn_anomaly):
+    valid_content = findings["valid_content"]
+
     result = aggregate_image_scores(
-        lsb_anomaly=lsb_anomaly,
-        entropy_deviation=entropy_dev,
-        rs_anomaly=rs_anomaly,
-        spa_anomaly=spa_anomaly,
-        srm_anomaly=srm_anomaly,
+        lsb_anomaly=findings["lsb_anomaly"],
+        entropy_deviation=findings["entropy_deviation"],
+        rs_anomaly=findings["rs_anomaly"],
+        spa_anomaly=findings["spa_anomaly"],
+        srm_anomaly=findings["srm_anomaly"],
         cnn_anomaly=cnn_anomaly,
-        extraction_success=extraction_success,
-        content_validity=valid_content
+        extraction_success=findings["extraction_success"],
+        content_validity=valid_content,
+        chi_square=findings["chi_square"],
+        histogram=findings["histogram"],
+        correlation=findings["correlation"]
     )
 
     result["hidden_content_found"] = valid_content
+    result["payload_estimates"] = findings["payload_estimates"]
 
     if valid_content:
-        result["extracted_content"] = extracted_text
+        extraction_type = findings["extraction_type"]
+        result["extracted_content"] = findings["extracted_text"]
         result["extraction_type"] = extraction_type
+        result["extraction_strategy"] = findings["extraction_strategy"]
         result["message"] = f"Hidden content ({extraction_type}) successfully extracted."
     else:
         result["message"] = "No valid hidden content found."
 
     return result
+
+
+# ==========================================
+# Main Image Analysis
+# ==========================================
+def analyze_image(source, progress=None):
+    """
+    source is a file path or an in-memory buffer of the encoded image.
+    progress(fraction, stage), if given, is called as each stage
+    completes; fraction runs from 0 to 1.
+    """
+
+    image = load_and_normalize_image(source)
+    _report(progress, 0.1, "decode")
+
+    # Shared per-request features: every detector reuses the same
+    # flattened view, LSB plane, grayscale plane and histograms
+    context = AnalysisContext(image)
+
+    findings = _image_findings(image, context, progress)
+    cnn_anomaly = cnn_score(image, context=context)
+    _report(progress, 1.0, "cnn_anomaly")
+
+    return _build_result(findings, cnn_anomaly)
+
+
+# ==========================================
+# Batch Image Analysis
+# ==========================================
+def analyze_images(file_paths, batch_size=CNN_BATCH_SIZE):
+    """
+    Bulk variant of analyze_image.
+    Images are processed in groups of `batch_size`: statistical detectors
+    run per image, then the CNN scores the whole group in one forward pass
+    on common-size tiles. Only the small tiles of one group are held in
+    memory at a time.
+    Returns one result per path, in order; an image that fails to load
+    yields {"error": ...} without affecting the others.
+    """
+    results = []
+
+    for start in range(0, len(file_paths), batch_size):
+        group = []
+
+        for file_path in file_paths[start:start + batch_size]:
+            try:
+                image = load_and_normalize_image(file_path)
+                context = AnalysisContext(image)
+                findings = _image_findings(image, context)
+                group.append((findings, cnn_tile(context.gray)))
+            except Exception as e:
+                group.append(({"error": str(e)}, None))
+
+        tiles = [tile for _, tile in group if tile is not None]
+        scores = iter(cnn_scores(tiles, batch_size=batch_size))
+
+        # Scatter the batched CNN scores back to their images
+        for findings, tile in group:
+            if tile is None:
+                results.append(findings)
+            else:
+                results.append(_build_result(findings, next(scores)))
+
+    return results
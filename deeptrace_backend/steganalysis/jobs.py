@@ -0,0 +1,221 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from .image_pipeline import analyze_image
+from .file_pipeline import analyze_file
+from .result_cache import get_result_cache
+
+
+# ==========================================
+# Configuration (environment overridable)
+# ==========================================
+JOB_WORKERS = int(os.environ.get("STEGANALYSIS_JOB_WORKERS", 2))
+JOB_RETENTION = int(os.environ.get("STEGANALYSIS_JOB_RETENTION", 3600))
+JOB_SPOOL_DIR = (
+    os.environ.get("STEGANALYSIS_JOB_SPOOL_DIR")
+    or os.path.join(tempfile.gettempdir(), "deeptrace_jobs")
+)
+
+QUEUE_KEY = "steganalysis:jobs:queue"
+JOB_KEY = "steganalysis:job:{}"
+
+
+# ==========================================
+# In-Process Broker (Redis-like interface)
+# ==========================================
+class InProcessBroker:
+    """
+    Minimal in-memory stand-in for the subset of the Redis API the job
+    manager uses: lpush/brpop for the queue and set/get/delete (with
+    expiry) for job records. A redis.Redis client can be passed to
+    JobManager in its place.
+    """
+
+    PURGE_INTERVAL = 60
+
+    def __init__(self):
+        self._lists = {}
+        self._values = {}
+        self._cond = threading.Condition()
+        self._last_purge = time.monotonic()
+
+    def lpush(self, key, value):
+        with self._cond:
+            self._lists.setdefault(key, []).insert(0, value)
+            self._cond.notify()
+
+    def brpop(self, key, timeout=0):
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while not self._lists.get(key):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return key, self._lists[key].pop()
+
+    def set(self, name, value, ex=None):
+        expires_at = time.monotonic() + ex if ex else None
+        with self._cond:
+            self._values[name] = (value, expires_at)
+            self._purge()
+
+    def get(self, name):
+        with self._cond:
+            entry = self._values.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._values[name]
+                return None
+            return value
+
+    def delete(self, name):
+        with self._cond:
+            self._values.pop(name, None)
+
+    def _purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        expired = [k for k, (_, exp) in self._values.items() if exp is not None and exp <= now]
+        for key in expired:
+            del self._values[key]
+
+
+# ==========================================
+# Job Manager
+# ==========================================
+class JobManager:
+    """
+    Submit/poll/result API for long-running analyses.
+
+    Jobs are queued on the broker and executed by a local pool of worker
+    threads, started on first submit. Records move through
+    queued → running → done/failed. Every save (each state change and
+    progress update) refreshes the record's expiry to `retention`
+    seconds, so finished records expire that long after completion and
+    records left behind by a dead worker expire on their own.
+    """
+
+    def __init__(self, broker=None, workers=JOB_WORKERS, retention=JOB_RETENTION, spool_dir=JOB_SPOOL_DIR):
+        self.broker = broker or InProcessBroker()
+        self.workers = workers
+        self.retention = retention
+        self.spool_dir = spool_dir
+
+        self._threads = []
+        self._lock = threading.Lock()
+
+    # --------------------------------------
+    # Client API
+    # --------------------------------------
+    def spool_path(self, filename):
+        """Where an upload for a new job should be saved before submit()."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        return os.path.join(self.spool_dir, f"{uuid.uuid4().hex}_{filename}")
+
+    def submit(self, file_path, kind, cache_key=None):
+        """
+        Queue analysis of a spooled upload; the worker deletes the file
+        when done. kind is "image" or "file". Returns the job id.
+        """
+        job_id = uuid.uuid4().hex
+
+        self._save({
+            "job_id": job_id,
+            "status": "queued",
+            "progress": 0.0,
+            "stage": None,
+            "submitted_at": time.time()
+        })
+        self.broker.lpush(QUEUE_KEY, json.dumps({
+            "job_id": job_id,
+            "path": file_path,
+            "kind": kind,
+            "cache_key": cache_key
+        }))
+
+        self._ensure_workers()
+        return job_id
+
+    def get(self, job_id):
+        """Full job record (with "result" once done), or None if unknown/expired."""
+        raw = self.broker.get(JOB_KEY.format(job_id))
+        return json.loads(raw) if raw is not None else None
+
+    # --------------------------------------
+    # Workers
+    # --------------------------------------
+    def _save(self, record):
+        self.broker.set(JOB_KEY.format(record["job_id"]), json.dumps(record), ex=self.retention)
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name="steganalysis-job-worker", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self.broker.brpop(QUEUE_KEY, timeout=5)
+            if item is None:
+                continue
+            self._run(json.loads(item[1]))
+
+    def _run(self, task):
+        record = self.get(task["job_id"]) or {"job_id": task["job_id"]}
+        record.update(status="running", started_at=time.time())
+        self._save(record)
+
+        def progress(fraction, stage):
+            record.update(progress=round(fraction, 3), stage=stage)
+            self._save(record)
+
+        try:
+            cache = get_result_cache()
+            result = cache.get(task["cache_key"]) if task["cache_key"] else None
+
+            if result is None:
+                if task["kind"] == "image":
+                    result = analyze_image(task["path"], progress=progress)
+                else:
+                    result = analyze_file(task["path"], progress=progress)
+
+                if task["cache_key"]:
+                    cache.put(task["cache_key"], result)
+
+            record.update(status="done", progress=1.0, result=result)
+
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+
+        finally:
+            record["finished_at"] = time.time()
+            self._save(record)
+
+            try:
+                os.remove(task["path"])
+            except OSError:
+                pass
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Process-wide job manager with the in-process broker."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = JobManager()
+        return _default_manager
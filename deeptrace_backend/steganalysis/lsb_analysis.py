@@ -1,18 +1,17 @@
-import numpy as np
+from .analysis_context import AnalysisContext
 
 
-def lsb_score(image):
+def lsb_score(image, context=None):
     # Detects abnormal bit uniformity.
     # In a natural image, LSBs are pseudo-random but not perfectly uniform.
     # If a message is encrypted or compressed, it's very close to 50/50.
     
-    flat = image.flatten()
-    lsb_bits = flat & 1
-    
-    zeros = np.sum(lsb_bits == 0)
-    ones = np.sum(lsb_bits == 1)
+    if context is None:
+        context = AnalysisContext(image)
+
+    total = len(context.lsb_bits)
+    ones = context.lsb_ones
     
-    total = zeros + ones
     if total == 0:
         return 0
         
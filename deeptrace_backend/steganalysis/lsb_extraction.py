@@ -1,62 +1,114 @@
 import numpy as np
 
+from stego.image.container import unpack_container
+from utils.bitstream import find_marker, pack_lsb
+
+# DeepTrace's legacy END_MARKER (see stego.image.lsb)
+END_MARKER = "1111111111111110"
+
 
 def bits_to_bytes(bits, max_bytes):
     """Helper to convert a 1D numpy array of bits into bytes."""
     
-    # 🌟 NEW: Check for DeepTrace's native END_MARKER to prevent trailing noise from destroying accuracy
-    END_MARKER = "1111111111111110"
-    bit_str = ''.join(bits[:max_bytes * 8].astype(str))
+    bits = bits[:max_bytes * 8]
     
     payloads = []
+    raw = pack_lsb(bits)
+
+    # Payload 0: DeepTrace container (magic + length + CRC) at the start
+    container = unpack_container(raw)
+    if container is not None:
+        payloads.append({"data": container[0], "delimiter": True, "container": True})
     
-    # Payload 1: Truncated at END_MARKER (if present)
-    if END_MARKER in bit_str:
-        clean_bits = bit_str.split(END_MARKER)[0]
-        byte_array = []
-        for i in range(0, len(clean_bits), 8):
-            chunk = clean_bits[i:i+8]
-            if len(chunk) == 8:
-                byte_array.append(int(chunk, 2))
-        payloads.append({"data": bytes(byte_array), "delimiter": True})
+    # Payload 1: Truncated at END_MARKER (if present) to prevent trailing noise from destroying accuracy
+    end = find_marker(bits, END_MARKER)
+    if end >= 0:
+        payloads.append({"data": pack_lsb(bits[:end]), "delimiter": True})
 
     # Payload 2: Raw (Standard max_bytes extraction)
-    # Reconstruct from bit_str to keep it efficient instead of looping over bits again
-    raw_array = []
-    for i in range(0, len(bit_str), 8):
-        chunk = bit_str[i:i+8]
-        if len(chunk) == 8:
-            raw_array.append(int(chunk, 2))
-    payloads.append({"data": bytes(raw_array), "delimiter": False})
+    payloads.append({"data": raw, "delimiter": False})
     
     return payloads
 
-def extract_lsb_payload(image, max_bytes=5000):
-    """
-    Extract raw LSB bitstream from image using multiple common strategies.
-    Returns a list of raw byte payloads.
-    """
-    payloads = []
+# ==========================================
+# Traversal Strategies
+# ==========================================
+# Each strategy returns the first n bits of its traversal order, reading
+# only the rows/columns/samples that hold them (views where possible),
+# so the cost scales with max_bytes rather than with the image size.
+
+def _rows_for(image, n_samples, per_row):
+    return min(-(-n_samples // per_row), image.shape[0])
+
+
+def _row_major(image, n):
+    # Row-major, interleaved channels (the DeepTrace embedding order)
+    rows = _rows_for(image, n, image.shape[1] * image.shape[2])
+    return image[:rows].reshape(-1)[:n] & 1
+
+
+def _column_major(image, n):
+    cols = min(-(-n // (image.shape[0] * image.shape[2])), image.shape[1])
+    return np.transpose(image[:, :cols], (1, 0, 2)).reshape(-1)[:n] & 1
+
 
-    # 1. Standard Flatten (Row-major, RGB/BGR interleaved)
-    flat = image.flatten()
-    bits_std = flat & 1
-    payloads.extend(bits_to_bytes(bits_std, max_bytes))
+def _channel(c):
+    def bits(image, n):
+        rows = _rows_for(image, n, image.shape[1])
+        return image[:rows, :, c].reshape(-1)[:n] & 1
+    return bits
 
-    # 2. Column-Major Flatten
-    img_t = np.transpose(image, (1, 0, 2))
-    flat_t = img_t.flatten()
-    bits_col = flat_t & 1
-    payloads.extend(bits_to_bytes(bits_col, max_bytes))
 
-    # 3. Channel-Specific (R, G, B individually)
-    for c in range(image.shape[2]):
-        channel_flat = image[:, :, c].flatten()
-        bits_channel = channel_flat & 1
-        payloads.extend(bits_to_bytes(bits_channel, max_bytes))
+def _reversed(image, n):
+    # Whole LSB stream read backwards: the last n samples, reversed
+    rows = _rows_for(image, n, image.shape[1] * image.shape[2])
+    return image[image.shape[0] - rows:].reshape(-1)[-n:][::-1] & 1
 
-    # 4. Standard Flatten, Reversed Bits
-    bits_rev = bits_std[::-1]
-    payloads.extend(bits_to_bytes(bits_rev, max_bytes))
 
-    return payloads
\ No newline at end of file
+def _bgr(image, n):
+    rows = _rows_for(image, n, image.shape[1] * image.shape[2])
+    return image[:rows, :, ::-1].reshape(-1)[:n] & 1
+
+
+def _bit_plane_2(image, n):
+    rows = _rows_for(image, n, image.shape[1] * image.shape[2])
+    return (image[:rows].reshape(-1)[:n] >> 1) & 1
+
+
+def _two_bit_lsb(image, n):
+    # Two bits per sample (bit 1 then bit 0)
+    samples = -(-n // 2)
+    rows = _rows_for(image, samples, image.shape[1] * image.shape[2])
+    prefix = image[:rows].reshape(-1)[:samples]
+    return np.stack([(prefix >> 1) & 1, prefix & 1], axis=-1).reshape(-1)[:n]
+
+
+# Tried in order; the first six are the original strategies
+STRATEGIES = (
+    ("row_major", _row_major),
+    ("column_major", _column_major),
+    ("channel_r", _channel(0)),
+    ("channel_g", _channel(1)),
+    ("channel_b", _channel(2)),
+    ("reversed", _reversed),
+    ("bgr", _bgr),
+    ("bit_plane_2", _bit_plane_2),
+    ("two_bit_lsb", _two_bit_lsb),
+)
+
+
+def extract_lsb_payload(image, max_bytes=5000):
+    """
+    Extract raw LSB bitstreams from image using multiple common strategies.
+
+    A generator: each strategy's prefix is only read when the caller asks
+    for its payloads, so a caller that stops at the first valid payload
+    skips the remaining strategies. Yields payload dicts tagged with the
+    "strategy" that produced them.
+    """
+    n = max_bytes * 8
+
+    for name, strategy in STRATEGIES:
+        for payload in bits_to_bytes(strategy(image, n), max_bytes):
+            payload["strategy"] = name
+            yield payload
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+
+# Minimum seconds between filesystem probes of a weights file. Within this
+# window both loaded models and "model absent" results are served from memory.
+MODEL_CHECK_INTERVAL = float(os.environ.get("STEGANALYSIS_MODEL_CHECK_INTERVAL", 5))
+
+
+class _ModelEntry:
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.model = None
+        self.stamp = None       # (size, mtime_ns) of the loaded file, None if absent
+        self.checked_at = None  # monotonic time of the last probe
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the ML detection models.
+
+    Each model is loaded lazily on first use and kept resident. Missing or
+    unloadable weights are cached as absent, and the weights file is
+    re-probed at most once per check interval; when its mtime or size
+    changes the model is reloaded in place (hot reload).
+    """
+
+    def __init__(self, check_interval=MODEL_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path, loader):
+        """loader(path) must return a ready-to-use model or raise."""
+        with self._lock:
+            self._entries[name] = _ModelEntry(path, loader)
+
+    def get(self, name):
+        """Return the loaded model, or None if it is unavailable."""
+        entry = self._refresh(name)
+        return entry.model if entry is not None else None
+
+    def fingerprint(self, name):
+        """
+        Short tag identifying the weights file of a model, from its size
+        and mtime only. Never loads the model, so cache lookups stay cheap
+        in processes that do not run inference.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            return "absent"
+
+        try:
+            stat = os.stat(entry.path)
+        except OSError:
+            return "absent"
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def _refresh(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            return None
+
+        now = time.monotonic()
+        if entry.checked_at is not None and now - entry.checked_at < self.check_interval:
+            return entry
+
+        with entry.lock:
+            # Another thread may have probed while we waited for the lock
+            if entry.checked_at is not None and now - entry.checked_at < self.check_interval:
+                return entry
+
+            try:
+                stat = os.stat(entry.path)
+                stamp = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                stamp = None
+
+            if stamp != entry.stamp:
+                model = None
+                if stamp is not None:
+                    try:
+                        model = entry.loader(entry.path)
+                    except Exception:
+                        # Corrupt or incompatible weights: treat as absent
+                        # until the file changes again
+                        model = None
+                entry.model = model
+                entry.stamp = stamp
+
+            entry.checked_at = time.monotonic()
+
+        return entry
+
+
+model_registry = ModelRegistry()
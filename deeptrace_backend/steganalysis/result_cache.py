@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+from .scoring_engine import PIPELINE_VERSION
+from .model_registry import model_registry
+from . import cnn_analysis, srm_analysis  # noqa: F401 (register their models)
+
+
+# ==========================================
+# Configuration (environment overridable)
+# ==========================================
+CACHE_MAX_ENTRIES = int(os.environ.get("STEGANALYSIS_CACHE_SIZE", 256))
+CACHE_DB_PATH = os.environ.get("STEGANALYSIS_CACHE_DB", "")
+CACHE_TTL = int(os.environ.get("STEGANALYSIS_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_DISK_BYTES = int(os.environ.get("STEGANALYSIS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+# ==========================================
+# Cache Keys
+# ==========================================
+def file_digest(file_path):
+    """SHA-256 of a file's bytes, read in chunks."""
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def pipeline_version():
+    """
+    Version tag for cached results: the scoring pipeline version plus a
+    fingerprint of the model weights, so retraining invalidates old entries.
+    """
+    parts = [PIPELINE_VERSION]
+    for name in ("cnn", "srm"):
+        parts.append(model_registry.fingerprint(name))
+    return ":".join(parts)
+
+
+def make_cache_key(digest, kind):
+    """
+    kind is the pipeline the upload was routed to: "image", "file", or
+    "image-batch" for batch analysis (CNN on a centre tile).
+    """
+    return f"{kind}:{digest}:{pipeline_version()}"
+
+
+# ==========================================
+# Two-Tier Result Cache
+# ==========================================
+class ResultCache:
+    """
+    Content-addressed cache of analysis results.
+
+    Tier 1 is a bounded in-memory LRU. Tier 2 is an optional SQLite file
+    shared between worker processes, with TTL and total-size eviction.
+    Results are stored as JSON, so every hit returns a fresh copy.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, db_path=CACHE_DB_PATH,
+                 ttl=CACHE_TTL, max_disk_bytes=CACHE_MAX_DISK_BYTES):
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        if self.db_path:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                    "created REAL NOT NULL, accessed REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _connect(self):
+        # One short-lived connection per operation keeps this thread-safe
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    # --------------------------------------
+    # Lookup
+    # --------------------------------------
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+        if self.db_path:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT value, created FROM results WHERE key = ? AND created >= ?",
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+
+            if row is not None:
+                value, created = row
+                self._remember(key, created, value)
+                self._count("disk_hits")
+                return json.loads(value)
+
+        self._count("misses")
+        return None
+
+    # --------------------------------------
+    # Store
+    # --------------------------------------
+    def put(self, key, result):
+        now = time.time()
+        value = json.dumps(result)
+
+        self._remember(key, now, value)
+        self._count("stores")
+
+        if self.db_path:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now)
+                )
+                self._evict_disk(conn, now)
+
+    def _remember(self, key, created, value):
+        with self._lock:
+            self._memory[key] = (created, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self, conn, now):
+        conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+
+        # Drop least recently used rows until the table fits again
+        excess = total - self.max_disk_bytes
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    # --------------------------------------
+    # Introspection
+    # --------------------------------------
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["disk_enabled"] = self.db_path is not None
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM results")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
+
+
+def cached_result(key, compute):
+    """Return the cached result for key, computing and storing it on a miss."""
+    cache = get_result_cache()
+
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.put(key, result)
+
+    return result
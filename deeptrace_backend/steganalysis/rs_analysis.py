@@ -1,41 +1,141 @@
 import numpy as np
 
-def rs_score(image):
+from .analysis_context import AnalysisContext
+
+# Rows processed per step (even, so 2x2 groups never straddle chunks)
+RS_CHUNK_ROWS = 512
+
+
+# Flipping functions on int16 samples:
+# F1 swaps 2k <-> 2k+1, F-1 swaps 2k-1 <-> 2k (so it can reach -1 and 256)
+def _flip_positive(x):
+    return x ^ 1
+
+
+def _flip_negative(x):
+    return ((x + 1) ^ 1) - 1
+
+
+def _discrimination(a, b, c, d):
+    # Smoothness of a 2x2 group read in snake order: a b / d c
+    return np.abs(b - a) + np.abs(c - b) + np.abs(d - c)
+
+
+def _regular_singular(groups):
+    """
+    R_M, S_M, R_-M, S_-M for the mask [0, 1, 1, 0]: groups that get
+    rougher (regular) or smoother (singular) under F1 and under F-1.
+    """
+    a, b, c, d = groups
+    original = _discrimination(a, b, c, d)
+
+    counts = []
+    for flip in (_flip_positive, _flip_negative):
+        flipped = _discrimination(a, flip(b), flip(c), d)
+        counts += [int(np.count_nonzero(flipped > original)), int(np.count_nonzero(flipped < original))]
+    return counts
+
+
+def _rs_counts(plane):
+    """
+    R_M, S_M, R_-M, S_-M for the plane and for the plane with every LSB
+    flipped, plus the number of 2x2 groups. One pass over row chunks.
+    """
+    height, width = plane.shape[0] - plane.shape[0] % 2, plane.shape[1] - plane.shape[1] % 2
+    counts = np.zeros(8, dtype=np.int64)
+
+    for start in range(0, height, RS_CHUNK_ROWS):
+        chunk = plane[start:min(start + RS_CHUNK_ROWS, height), :width]
+
+        # The four members of every 2x2 group, upcast once
+        groups = [g.astype(np.int16) for g in (
+            chunk[0::2, 0::2], chunk[0::2, 1::2], chunk[1::2, 1::2], chunk[1::2, 0::2]
+        )]
+
+        counts[:4] += _regular_singular(groups)
+        counts[4:] += _regular_singular([g ^ 1 for g in groups])
+
+    return counts, (height // 2) * (width // 2)
+
+
+def _solve_rate(counts, groups):
+    """
+    Fridrich's RS estimate of the embedding rate p from the counts at
+    p/2 (image) and 1 - p/2 (LSB-flipped image):
+        2(d1 + d0) z^2 + (d-0 - d-1 - d1 - 3 d0) z + d0 - d-0 = 0
+    with the smaller-magnitude root z and p = z / (z - 1/2).
+    """
+    if groups == 0:
+        return 0.0
+
+    r_m, s_m, r_nm, s_nm, r_m1, s_m1, r_nm1, s_nm1 = counts / groups
+    d0, d1 = r_m - s_m, r_m1 - s_m1
+    dn0, dn1 = r_nm - s_nm, r_nm1 - s_nm1
+
+    a = 2 * (d1 + d0)
+    b = dn0 - dn1 - d1 - 3 * d0
+    c = d0 - dn0
+
+    if abs(a) < 1e-12:
+        if abs(b) < 1e-12:
+            return 0.0
+        z = -c / b
+    else:
+        # Near full embedding R_M ~ S_M and the roots turn complex; their
+        # real part is the closest real solution
+        root = np.sqrt(max(b * b - 4 * a * c, 0.0))
+        z = min((-b + root) / (2 * a), (-b - root) / (2 * a), key=abs)
+
+    if abs(z - 0.5) < 1e-12:
+        return 1.0
+
+    return float(min(max(z / (z - 0.5), 0.0), 1.0))
+
+
+def rs_estimate(image, context=None):
+    """
+    Full RS (Regular-Singular) analysis per channel.
+    Returns {"embedding_rate", "payload_bytes", "score", "channels": [...]}
+    where the rate is the estimated fraction of samples carrying message
+    bits and payload_bytes the matching message length.
+    """
+    if context is None:
+        context = AnalysisContext(image)
+
+    return context.derived("rs", lambda: _estimate(image))
+
+
+def _estimate(image):
+    planes = image[:, :, None] if image.ndim == 2 else image
+    channels = []
+
+    for c in range(planes.shape[2]):
+        counts, groups = _rs_counts(planes[:, :, c])
+        rate = _solve_rate(counts, groups)
+        samples = planes.shape[0] * planes.shape[1]
+        channels.append({
+            "embedding_rate": round(rate, 4),
+            "payload_bytes": int(rate * samples / 8)
+        })
+
+    samples = planes.shape[0] * planes.shape[1] * planes.shape[2]
+    payload_bytes = sum(ch["payload_bytes"] for ch in channels)
+    rate = payload_bytes * 8 / samples if samples else 0.0
+
+    return {
+        "embedding_rate": round(rate, 4),
+        "payload_bytes": payload_bytes,
+        "score": min(int(rate * 100), 100),
+        "channels": channels
+    }
+
+
+def rs_score(image, context=None):
     """
     RS (Regular-Singular) Analysis for LSB Steganography detection.
-    Splits pixels into groups of 4, applies LSB flipping, and measures smoothness changes.
-    Returns a normalized anomaly score 0-100.
+    Returns the estimated embedding rate as an anomaly score 0-100.
     """
     try:
-        pixels = image.flatten().astype(np.int32)
-        
-        n = len(pixels)
-        n = n - (n % 4)
-        if n < 4:
-            return 0
-            
-        pixels = pixels[:n]
-        groups = pixels.reshape(-1, 4)
-        
-        # Original smoothness
-        diffs = np.abs(np.diff(groups, axis=1))
-        f_orig = np.sum(diffs, axis=1)
-        
-        # Flipping function (LSB flip is mathematically equivalent to XOR 1)
-        flipped_groups = groups ^ 1
-        flipped_diffs = np.abs(np.diff(flipped_groups, axis=1))
-        f_flip = np.sum(flipped_diffs, axis=1)
-        
-        R = np.sum(f_flip < f_orig)
-        S = np.sum(f_flip > f_orig)
-        
-        total = R + S
-        if total == 0:
-            return 0
-            
-        embedding_rate = abs(R - S) / total
-        
-        score = min(int(embedding_rate * 100), 100)
-        return score
+        return rs_estimate(image, context)["score"]
     except Exception:
         return 0
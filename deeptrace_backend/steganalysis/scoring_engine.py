@@ -1,12 +1,20 @@
-def aggregate_image_scores(lsb_anomaly, entropy_deviation, rs_anomaly, spa_anomaly, srm_anomaly, cnn_anomaly, extraction_success, content_validity):
+# Bump whenever detector logic or weights change the shape or values of
+# aggregated results; cached results from older versions are then ignored.
+PIPELINE_VERSION = "7"
+
+def aggregate_image_scores(lsb_anomaly, entropy_deviation, rs_anomaly, spa_anomaly, srm_anomaly, cnn_anomaly, extraction_success, content_validity,
+                           chi_square=0, histogram=0, correlation=0):
     # Weights for Risk Assessment Engine
     # By stacking multi-layered deep detections, we form a comprehensive anomaly rating.
     w1 = 0.05  # LSB anomaly
     w2 = 0.05  # Entropy deviation
     w3 = 0.05  # RS anomaly
     w4 = 0.05  # SPA anomaly
-    w_srm = 0.10 # SRM anomaly
-    w_cnn = 0.10 # CNN anomaly
+    w_chi = 0.02  # Chi-square pair equalization
+    w_hist = 0.02  # Histogram pair flattening
+    w_corr = 0.02  # Neighbour decorrelation
+    w_srm = 0.07 # SRM anomaly
+    w_cnn = 0.07 # CNN anomaly
     w5 = 0.20  # Extraction success
     w6 = 0.40  # Content validity
 
@@ -15,6 +23,9 @@ def aggregate_image_scores(lsb_anomaly, entropy_deviation, rs_anomaly, spa_anoma
         (entropy_deviation * w2) +
         (rs_anomaly * w3) +
         (spa_anomaly * w4) +
+        (chi_square * w_chi) +
+        (histogram * w_hist) +
+        (correlation * w_corr) +
         (srm_anomaly * w_srm) +
         (cnn_anomaly * w_cnn) +
         ((100 if extraction_success else 0) * w5) +
@@ -50,6 +61,9 @@ def aggregate_image_scores(lsb_anomaly, entropy_deviation, rs_anomaly, spa_anoma
             "entropy_deviation_score": entropy_deviation,
             "rs_anomaly_score": rs_anomaly,
             "spa_anomaly_score": spa_anomaly,
+            "chi_square_score": chi_square,
+            "histogram_score": histogram,
+            "correlation_score": correlation,
             "srm_anomaly_score": srm_anomaly,
             "cnn_anomaly_score": cnn_anomaly,
             "extraction_success": extraction_success,
@@ -57,17 +71,19 @@ def aggregate_image_scores(lsb_anomaly, entropy_deviation, rs_anomaly, spa_anoma
         }
     }
 
-def aggregate_file_scores(bit_score, entropy_score, size_score, header_score, chi_square=0):
+def aggregate_file_scores(bit_score, entropy_score, size_score, header_score, chi_square=0, localized_score=0):
     w1 = 0.25
     w2 = 0.25
     w3 = 0.25
     w4 = 0.25
+    w5 = 0.25  # Localized high-entropy region (sliding-window profile)
     
     risk_percentage = (
         (bit_score * w1) +
         (entropy_score * w2) +
         (size_score * w3) +
-        (header_score * w4)
+        (header_score * w4) +
+        (localized_score * w5)
     )
     
     risk_percentage = min(max(int(risk_percentage), 0), 100)
@@ -91,6 +107,7 @@ def aggregate_file_scores(bit_score, entropy_score, size_score, header_score, ch
             "bit_distribution_score": bit_score,
             "entropy_deviation_score": entropy_score,
             "size_anomaly_score": size_score,
-            "header_anomaly_score": header_score
+            "header_anomaly_score": header_score,
+            "localized_anomaly_score": localized_score
         }
     }
\ No newline at end of file
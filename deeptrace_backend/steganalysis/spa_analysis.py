@@ -1,38 +1,105 @@
 import numpy as np
 
-def spa_score(image):
+from .analysis_context import AnalysisContext
+
+# ==========================================
+# Trace Sets
+# ==========================================
+# Every (u, v) value pair falls in exactly one of Dumitrescu's sets:
+#   X: v even and u < v, or v odd and u > v
+#   W: u and v differ only in the LSB ({2k, 2k+1})
+#   V: the rest of Y (v even and u > v, or v odd and u < v)
+#   Z: u == v
+_X, _V, _W, _Z = range(4)
+
+
+def _trace_set_table():
+    u, v = np.meshgrid(np.arange(256), np.arange(256), indexing="ij")
+    even = v % 2 == 0
+
+    table = np.full((256, 256), _V, dtype=np.intp)
+    table[(even & (u < v)) | (~even & (u > v))] = _X
+    table[(u >> 1 == v >> 1) & (u != v)] = _W
+    table[u == v] = _Z
+    return table.reshape(-1)
+
+
+# Built once; a pair matrix becomes set sizes with one weighted bincount
+_TRACE_SET = _trace_set_table()
+
+
+def _trace_sets(matrix):
+    """|X|, |V|, |W|, |Z| of the pairs counted in a 256x256 matrix."""
+    return np.bincount(_TRACE_SET, weights=matrix.reshape(-1), minlength=4)
+
+
+def _solve_rate(matrix):
+    """
+    Dumitrescu's SPA estimate of the embedding rate p, the smaller root of
+        (|W| + |Z|) / 2 * p^2 + (2|X| - |P|) p + |Y| - |X| = 0
+    where Y = V + W and P is every pair.
+    """
+    total = matrix.sum()
+    if total == 0:
+        return 0.0
+
+    x, v, w, z = _trace_sets(matrix) / total
+    a = (w + z) / 2
+    b = 2 * x - 1
+    c = v + w - x
+
+    if abs(a) < 1e-12:
+        if abs(b) < 1e-12:
+            return 0.0
+        p = -c / b
+    else:
+        # Complex roots (rates near 1): their real part is the closest real solution
+        root = np.sqrt(max(b * b - 4 * a * c, 0.0))
+        p = min((-b + root) / (2 * a), (-b - root) / (2 * a))
+
+    return float(min(max(p, 0.0), 1.0))
+
+
+def spa_estimate(image, context=None):
+    """
+    Sample Pair Analysis over the horizontally and vertically adjacent
+    pairs of each channel (the shared co-occurrence matrices).
+    Returns {"embedding_rate", "payload_bytes", "score", "channels": [...]}
+    where the combined rate is solved on the pairs of all channels pooled.
+    """
+    if context is None:
+        context = AnalysisContext(image)
+
+    return context.derived("spa", lambda: _estimate(context.cooccurrence))
+
+
+def _estimate(stats):
+    samples = stats.histogram[0].sum()
+    channels = []
+
+    for c in range(stats.channels):
+        rate = _solve_rate(stats.pairs(c))
+        channels.append({
+            "embedding_rate": round(rate, 4),
+            "payload_bytes": int(rate * samples / 8)
+        })
+
+    rate = _solve_rate(stats.pairs())
+
+    return {
+        "embedding_rate": round(rate, 4),
+        "payload_bytes": int(rate * samples * stats.channels / 8),
+        "score": min(int(rate * 100), 100),
+        "channels": channels
+    }
+
+
+def spa_score(image, context=None):
     """
     Sample Pair Analysis (SPA) for LSB Steganography detection.
-    Analyzes transitions between pixel pairs to detect LSB embedding.
-    Returns a normalized anomaly score 0-100.
+    Returns the estimated embedding rate as an anomaly score 0-100.
     """
     try:
-        pixels = image.flatten().astype(np.int32)
-        
-        n = len(pixels)
-        n = n - (n % 2)
-        if n < 2:
-            return 0
-            
-        pixels = pixels[:n]
-        pairs = pixels.reshape(-1, 2)
-        
-        # Detect odd-even and even-odd transitions
-        even_x = (pairs[:, 0] % 2 == 0)
-        odd_y = (pairs[:, 1] % 2 == 1)
-        even_odd = np.sum(even_x & odd_y)
-        
-        odd_x = (pairs[:, 0] % 2 == 1)
-        even_y = (pairs[:, 1] % 2 == 0)
-        odd_even = np.sum(odd_x & even_y)
-        
-        total = even_odd + odd_even
-        if total == 0:
-            return 0
-            
-        embedding_rate = abs(even_odd - odd_even) / total
-        
-        score = min(int(embedding_rate * 100), 100)
-        return score
+        return spa_estimate(image, context)["score"]
     except Exception:
         return 0
@@ -6,12 +6,19 @@ except ImportError:
 
 import numpy as np
 
+from .analysis_context import AnalysisContext
+from .model_registry import model_registry
+
+MODEL_PATH = "models/srm_classifier.pkl"
+
 # Optional scikit-learn import
 try:
     import joblib
     # from sklearn.ensemble import RandomForestClassifier
     import warnings
     warnings.filterwarnings("ignore", category=UserWarning)
+
+    model_registry.register("srm", MODEL_PATH, joblib.load)
 except Exception:
     pass
 
@@ -41,7 +48,7 @@ def extract_srm_features(residual):
     hist_norm = hist / (np.sum(hist) + 1e-7)
     return hist_norm
 
-def srm_score(image):
+def srm_score(image, context=None):
     """
     Spatial Rich Model (SRM) Feature-Based Analysis.
     Attempts to use a trained ML classifier (e.g., Random Forest) to evaluate 
@@ -50,11 +57,10 @@ def srm_score(image):
     Returns a normalized anomaly score 0-100.
     """
     try:
-        # 1. Convert to grayscale if it's color
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = image
+        # 1. Convert to grayscale if it's color (shared with the CNN layer)
+        if context is None:
+            context = AnalysisContext(image)
+        gray = context.gray
             
         # 2. Extract residuals
         residual = residual_filter(gray)
@@ -63,27 +69,32 @@ def srm_score(image):
         features = extract_srm_features(residual)
         
         # 4. Attempt ML inference (assuming model exists locally)
-        model_path = "models/srm_classifier.pkl"
-        
-        try:
-            model = joblib.load(model_path)
-            # prediction yields probabilities: [P(Cover), P(Stego)]
-            probs = model.predict_proba([features])[0]
-            stego_prob = probs[1]
-            return min(int(stego_prob * 100), 100)
-            
-        except Exception:
-            # Fallback heuristic: High residual noise variance often implies LSB alteration
-            # This is a proxy estimation for demonstration and pipeline completeness
-            variance = np.var(residual)
-            
-            # Typical natural images might have certain variance ranges depending on texture
-            # A completely flat heuristic isn't perfect, but we translate variance to a 0-100 scale
-            # bounded arbitrarily for demonstration.
-            heuristic_prob = min(variance / 2000.0, 1.0) 
-            score = int(heuristic_prob * 100)
-            # dampen the heuristic since it's just a proxy
-            return min(max(score - 20, 0), 100)
+        # The registry caches both the loaded model and its absence
+        model = model_registry.get("srm")
+
+        if model is not None:
+            try:
+                # prediction yields probabilities: [P(Cover), P(Stego)]
+                probs = model.predict_proba([features])[0]
+            except Exception:
+                # A model that fails to predict falls back like a missing one
+                probs = None
+
+            if probs is not None:
+                stego_prob = probs[1]
+                return min(int(stego_prob * 100), 100)
+
+        # Fallback heuristic: High residual noise variance often implies LSB alteration
+        # This is a proxy estimation for demonstration and pipeline completeness
+        variance = np.var(residual)
+
+        # Typical natural images might have certain variance ranges depending on texture
+        # A completely flat heuristic isn't perfect, but we translate variance to a 0-100 scale
+        # bounded arbitrarily for demonstration.
+        heuristic_prob = min(variance / 2000.0, 1.0)
+        score = int(heuristic_prob * 100)
+        # dampen the heuristic since it's just a proxy
+        return min(max(score - 20, 0), 100)
 
     except Exception:
         return 0
@@ -0,0 +1,64 @@
+import struct
+import zlib
+
+
+# ======================================================
+# CONTAINER FORMAT
+# ======================================================
+#
+# Header (13 bytes, big-endian) followed by the payload:
+#
+#   magic    3s   b"DTS"
+#   version  B    container version (1)
+#   flags    B    FLAG_* bits
+#   length   I    payload length in bytes
+#   crc32    I    CRC-32 of the payload
+#
+# The length lets a reader fetch exactly header + payload bits; unlike the
+# legacy END_MARKER delimiter, any byte sequence can be carried.
+
+MAGIC = b"DTS"
+VERSION = 1
+
+# Payload is arbitrary bytes rather than UTF-8 text
+FLAG_BINARY = 0x01
+
+HEADER = struct.Struct(">3sBBII")
+HEADER_SIZE = HEADER.size
+
+
+def pack_container(payload, flags=0):
+    """Header + payload bytes ready to embed."""
+    return HEADER.pack(MAGIC, VERSION, flags, len(payload), zlib.crc32(payload)) + payload
+
+
+def read_header(data):
+    """
+    Parse the header at the start of data. Returns (flags, length, crc)
+    or None when data does not start with a supported container.
+    """
+    if len(data) < HEADER_SIZE:
+        return None
+
+    magic, version, flags, length, crc = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+
+    return flags, length, crc
+
+
+def unpack_container(data):
+    """
+    (payload, flags) from bytes holding a whole container, or None when
+    there is no container or it is truncated or fails its CRC.
+    """
+    header = read_header(data)
+    if header is None:
+        return None
+
+    flags, length, crc = header
+    payload = bytes(data[HEADER_SIZE:HEADER_SIZE + length])
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        return None
+
+    return payload, flags
@@ -0,0 +1,47 @@
+import io
+import os
+import zlib
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+# zlib level for stego PNG output: 1 is several times faster than
+# Pillow's default (6) and the LSB noise barely compresses either way
+PNG_COMPRESS_LEVEL = int(os.environ.get("STEGO_PNG_COMPRESS_LEVEL", 1))
+
+# zlib strategy: default, filtered, huffman, rle or fixed
+PNG_STRATEGY = os.environ.get("STEGO_PNG_STRATEGY", "default")
+
+STRATEGIES = {
+    "default": zlib.Z_DEFAULT_STRATEGY,
+    "filtered": zlib.Z_FILTERED,
+    "huffman": zlib.Z_HUFFMAN_ONLY,
+    "rle": zlib.Z_RLE,
+    "fixed": zlib.Z_FIXED
+}
+
+
+# ======================================================
+# PNG OUTPUT
+# ======================================================
+
+def encode_png(image, compress_level=None, strategy=None):
+    """
+    Encode image as PNG (once) into a buffer positioned at its start,
+    ready to be streamed with send_file.
+    """
+    strategy = strategy or PNG_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown PNG strategy: {strategy}")
+
+    buffer = io.BytesIO()
+    image.save(
+        buffer,
+        format="PNG",
+        compress_level=PNG_COMPRESS_LEVEL if compress_level is None else compress_level,
+        compress_type=STRATEGIES[strategy]
+    )
+    buffer.seek(0)
+    return buffer
@@ -1,62 +1,113 @@
 import numpy as np
 from PIL import Image
-from .utils import text_to_bits, bits_to_text
+from utils.bitstream import decode_until_marker
 from .capacity import image_capacity
+from .container import FLAG_BINARY, HEADER_SIZE, pack_container, read_header, unpack_container
 
-END_MARKER = "1111111111111110"  # 16-bit delimiter
+# Legacy 16-bit delimiter; images embedded before the container format
+# still extract through the fallback decoder
+END_MARKER = "1111111111111110"
 
 
-def embed_lsb(image, secret):
+def _leading_rows(image, n_samples):
+    # Number of image rows holding the first n_samples channel values
+    return min(-(-n_samples // (image.width * 3)), image.height)
+
+
+def read_lsb_bytes(image, n_bytes):
     """
-    Embed secret string inside image using 1-bit LSB via NumPy.
-    Returns modified image.
+    The first n_bytes of the LSB stream, reading only the rows that hold
+    them (O(n_bytes), not O(image)).
+    """
+    n_samples = n_bytes * 8
+    band = np.asarray(image.crop((0, 0, image.width, _leading_rows(image, n_samples))), dtype=np.uint8)
+    samples = band.reshape(-1)[:n_samples]
+    return np.packbits(samples[:len(samples) // 8 * 8] & 1).tobytes()
+
+
+def embed_lsb(image, secret, in_place=False):
+    """
+    Embed secret (str, stored as UTF-8 text, or bytes, stored as a binary
+    payload) inside image using 1-bit LSB via NumPy, wrapped in the
+    length-prefixed container. Only the rows holding the payload are read
+    and written back. Returns the modified image (image itself when
+    in_place is True).
     """
 
     if image.mode != "RGB":
         raise ValueError("Image must be RGB")
 
-    secret_bits = text_to_bits(secret) + END_MARKER
+    if isinstance(secret, str):
+        container = pack_container(secret.encode("utf-8"))
+    else:
+        container = pack_container(bytes(secret), FLAG_BINARY)
+
     capacity = image_capacity(image)
 
-    if len(secret_bits) > capacity * 8:
+    if len(container) > capacity:
         raise ValueError("Secret message too large for this image")
 
-    # Map the secret bits to an integer array
-    bits_array = np.fromiter((int(b) for b in secret_bits), dtype=np.uint8)
+    # Map the container bytes to a bit array (MSB first)
+    bits_array = np.unpackbits(np.frombuffer(container, dtype=np.uint8))
 
-    # Convert image to numpy array and flatten it
-    img_array = np.array(image, dtype=np.uint8)
-    flat_img = img_array.flatten()
+    stego = image if in_place else image.copy()
 
-    # Apply NumPy vectorized bitwise operation
-    flat_img[:len(bits_array)] = (flat_img[:len(bits_array)] & ~np.uint8(1)) | bits_array
+    # Writable copy of just the leading rows the payload touches
+    width = image.width
+    band = np.array(stego.crop((0, 0, width, _leading_rows(image, len(bits_array)))), dtype=np.uint8)
+    flat_band = band.reshape(-1)
 
-    # Reshape back to original shape and return Image
-    img_array = flat_img.reshape(img_array.shape)
+    # Apply NumPy vectorized bitwise operation
+    flat_band[:len(bits_array)] = (flat_band[:len(bits_array)] & ~np.uint8(1)) | bits_array
 
-    return Image.fromarray(img_array, mode="RGB")
+    stego.paste(Image.fromarray(band, mode="RGB"), (0, 0))
+    return stego
 
 
-def extract_lsb(image):
+def extract_lsb_bytes(image):
     """
-    Extract hidden message from image using NumPy arrays.
+    Extract the hidden payload as (bytes, flags), or (None, 0) if there
+    is none. Container images cost header + payload bits; images without
+    a container header fall back to the legacy END_MARKER scan.
     """
 
     if image.mode != "RGB":
         raise ValueError("Image must be RGB")
 
-    # Convert image to numpy flat array
-    img_array = np.array(image, dtype=np.uint8)
-    flat_img = img_array.flatten()
-
-    # Extract all LSBs cleanly
-    lsb_bits = flat_img & 1
-    
-    # Fast delimiter slicing
-    bit_str = ''.join(lsb_bits.astype(str))
-    
-    if END_MARKER in bit_str:
-        clean_bits = bit_str.split(END_MARKER)[0]
-        return bits_to_text(clean_bits)
-
-    return ""
\ No newline at end of file
+    header = read_header(read_lsb_bytes(image, HEADER_SIZE))
+
+    if header is not None:
+        _, length, _ = header
+
+        if HEADER_SIZE + length > image_capacity(image):
+            raise ValueError("Corrupted stego payload (length exceeds image capacity)")
+
+        unpacked = unpack_container(read_lsb_bytes(image, HEADER_SIZE + length))
+        if unpacked is None:
+            raise ValueError("Corrupted stego payload (CRC mismatch)")
+
+        return unpacked
+
+    # Legacy: convert image to numpy flat array and scan for the delimiter
+    flat_img = np.asarray(image, dtype=np.uint8).reshape(-1)
+
+    # Vectorized delimiter search over the LSB stream; stops at the first marker
+    payload = decode_until_marker(flat_img, END_MARKER)
+
+    if payload is not None:
+        return payload, 0
+
+    return None, 0
+
+
+def extract_lsb(image):
+    """
+    Extract hidden message from image as text.
+    """
+
+    payload, _ = extract_lsb_bytes(image)
+
+    if payload is not None:
+        return payload.decode("utf-8", errors="ignore")
+
+    return ""
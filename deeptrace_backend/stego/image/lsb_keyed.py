@@ -100,12 +100,12 @@ def decrypt_message(payload: str, password: str) -> str:
 # LSB + AES WRAPPERS
 # ======================================================
 
-def embed_lsb_keyed(image, secret: str, password: str):
+def embed_lsb_keyed(image, secret: str, password: str, in_place=False):
     """
     Encrypt secret first, then embed using LSB.
     """
     encrypted_payload = encrypt_message(secret, password)
-    return embed_lsb(image, encrypted_payload)
+    return embed_lsb(image, encrypted_payload, in_place=in_place)
 
 
 def extract_lsb_keyed(image, password: str) -> str:
@@ -1,5 +1,4 @@
 from PIL import Image
-import io
 
 # Optional HEIF support: pillow_heif may pull in heavy native deps.
 # Import it only if available; otherwise continue without HEIF support.
@@ -13,20 +12,17 @@ except Exception:
 def normalize_image(file):
     """
     Accepts ANY image format.
-    Converts to clean RGB PNG-ready image.
-    Returns fresh RGB PIL Image.
+    Decodes it once into a fresh RGB image that callers may modify in
+    place (an RGB -> RGB round trip through PNG is lossless, so no
+    re-encode is needed).
     """
 
     img = Image.open(file)
 
     # Convert to RGB (removes alpha and weird modes)
-    img = img.convert("RGB")
+    if img.mode != "RGB":
+        return img.convert("RGB")
 
-    # 🔥 Force re-encode into clean PNG buffer
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-
-    clean_img = Image.open(buffer).convert("RGB")
-
-    return clean_img
\ No newline at end of file
+    # Decode now, detached from the upload stream
+    img.load()
+    return img
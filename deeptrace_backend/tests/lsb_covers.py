@@ -0,0 +1,21 @@
+"""Synthetic covers and LSB embeddings shared by the rate-estimator tests."""
+import numpy as np
+
+
+def smooth_cover():
+    # Smooth planes with sensor-like noise, lightly low-pass filtered
+    rng = np.random.RandomState(0)
+    y, x = np.mgrid[0:302, 0:402]
+    planes = np.stack([x * 0.2 + y * 0.1 + 30 * np.sin(x / 37.0), y * 0.3 + 20 * np.cos(x / 53.0), (x + y) * 0.15], -1)
+    planes = planes + 40 + rng.normal(0, 6, planes.shape)
+    blurred = sum(planes[dy:dy + 300, dx:dx + 400] for dy in range(3) for dx in range(3)) / 9
+    return blurred.clip(0, 255).astype(np.uint8)
+
+
+def embed_at_rate(image, rate, seed=1):
+    # LSB replacement of a random message in a random subset of samples
+    rng = np.random.RandomState(seed)
+    flat = image.copy().reshape(-1)
+    idx = rng.choice(flat.size, int(rate * flat.size), replace=False)
+    flat[idx] = (flat[idx] & 0xFE) | rng.randint(0, 2, idx.size).astype(np.uint8)
+    return flat.reshape(image.shape)
@@ -1,14 +1,22 @@
+import os
+import tempfile
+
 import cv2
 import numpy as np
 from steganalysis.image_pipeline import analyze_image
 
-# Create a dummy image
+# Create a dummy image (in a temp dir, not the working directory)
 dummy_image = np.zeros((100, 100, 3), dtype=np.uint8)
-cv2.imwrite("dummy.png", dummy_image)
+dummy_dir = tempfile.mkdtemp(prefix="deeptrace_test_")
+dummy_path = os.path.join(dummy_dir, "dummy.png")
+cv2.imwrite(dummy_path, dummy_image)
 
 try:
-    result = analyze_image("dummy.png")
+    result = analyze_image(dummy_path)
     print("Success:", result)
 except Exception as e:
     import traceback
     traceback.print_exc()
+finally:
+    os.remove(dummy_path)
+    os.rmdir(dummy_dir)
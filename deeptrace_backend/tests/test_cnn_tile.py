@@ -0,0 +1,48 @@
+import numpy as np
+
+from steganalysis.cnn_analysis import cnn_tile
+
+
+def _plane(h, w):
+    return (np.arange(h * w) % 251).reshape(h, w).astype(np.uint8)
+
+
+def test_large_planes_are_centre_cropped():
+    for h, w in [(40, 40), (41, 40), (40, 43), (57, 33)]:
+        gray = _plane(h, w)
+        tile = cnn_tile(gray, size=32)
+
+        top, left = (h - 32) // 2, (w - 32) // 2
+        assert tile.shape == (32, 32)
+        assert tile.flags["C_CONTIGUOUS"]
+        assert np.array_equal(tile, gray[top:top + 32, left:left + 32])
+
+
+def test_small_planes_are_mirror_padded():
+    for h, w in [(10, 10), (9, 10), (10, 7), (1, 1)]:
+        gray = _plane(h, w)
+        tile = cnn_tile(gray, size=16)
+
+        top, left = (16 - h) // 2, (16 - w) // 2
+        assert tile.shape == (16, 16)
+        # The original sits in the middle, reflected outwards edge-first
+        assert np.array_equal(tile[top:top + h, left:left + w], gray)
+        if top:
+            assert np.array_equal(tile[top - 1, left:left + w], gray[0])
+        if left:
+            assert np.array_equal(tile[top:top + h, left - 1], gray[:, 0])
+
+
+def test_mixed_planes_pad_one_axis_and_crop_the_other():
+    gray = _plane(10, 41)
+    tile = cnn_tile(gray, size=16)
+
+    assert tile.shape == (16, 16)
+    assert np.array_equal(tile[3:13], gray[:, 12:28])
+
+
+if __name__ == "__main__":
+    test_large_planes_are_centre_cropped()
+    test_small_planes_are_mirror_padded()
+    test_mixed_planes_pad_one_axis_and_crop_the_other()
+    print("✅ CNN tile tests passed")
@@ -0,0 +1,37 @@
+import base64
+
+import numpy as np
+
+from steganalysis.content_validator import validate_content
+
+
+def test_text_and_cipher_classification():
+    assert validate_content(b"Hello DeepTrace secret message!") == ("plaintext", "Hello DeepTrace secret message!")
+    assert validate_content(b"\x00\x00  padded text here \n") == ("plaintext", "padded text here")
+
+    token = base64.b64encode(bytes(range(48))).decode()
+    # Too many control bytes for plaintext, but carries a base64 block
+    text = f"\x07\x07\x07\x07 key: {token}"
+    assert validate_content(text.encode()) == ("cipher text", text)
+    assert validate_content(b"$$$$$$$$$$$$$$$$$$$$") == ("nothing found", None)
+    assert validate_content(b"") == ("nothing found", None)
+
+
+def test_random_bytes_are_rejected():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        assert validate_content(rng.integers(0, 256, 5000, dtype=np.uint8).tobytes()) == ("nothing found", None)
+
+
+def test_embedded_files_are_reported():
+    for magic, name in [(b"PK\x03\x04", "ZIP"), (b"\x89PNG\r\n\x1a\n", "PNG"), (b"\xff\xd8\xff\xe0", "JPEG"),
+                        (b"%PDF-1.7", "PDF"), (b"\x1f\x8b\x08\x00", "GZIP")]:
+        payload = magic + bytes(100)
+        assert validate_content(payload) == ("embedded file", f"{name} file ({len(payload)} bytes)")
+
+
+if __name__ == "__main__":
+    test_text_and_cipher_classification()
+    test_random_bytes_are_rejected()
+    test_embedded_files_are_reported()
+    print("✅ Content validator tests passed")
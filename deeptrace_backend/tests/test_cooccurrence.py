@@ -0,0 +1,62 @@
+import numpy as np
+
+import steganalysis.cooccurrence as cooccurrence
+from steganalysis.analysis_context import AnalysisContext
+from steganalysis.chi_square_analysis import chi_square_score
+from steganalysis.histogram_analysis import histogram_score
+from steganalysis.cooccurrence import build_cooccurrence, pair_correlation
+
+
+def _reference(plane):
+    plane = plane.astype(np.int64)
+    horizontal = np.zeros((256, 256), dtype=np.int64)
+    vertical = np.zeros((256, 256), dtype=np.int64)
+    np.add.at(horizontal, (plane[:, :-1].ravel(), plane[:, 1:].ravel()), 1)
+    np.add.at(vertical, (plane[:-1].ravel(), plane[1:].ravel()), 1)
+    return horizontal, vertical, np.bincount(plane.ravel(), minlength=256)
+
+
+def test_chunked_counts_match_direct_counting():
+    rng = np.random.default_rng(0)
+    opencv = cooccurrence.cv2
+
+    try:
+        for backend in (opencv, None):
+            cooccurrence.cv2 = backend
+            for shape in [(1, 1, 3), (9, 7, 3), (301, 17, 3)]:
+                image = rng.integers(0, 256, shape, dtype=np.uint8)
+                stats = build_cooccurrence(image, chunk_rows=64)
+
+                for c in range(shape[2]):
+                    horizontal, vertical, histogram = _reference(image[:, :, c])
+                    assert np.array_equal(stats.horizontal[c], horizontal)
+                    assert np.array_equal(stats.vertical[c], vertical)
+                    assert np.array_equal(stats.histogram[c], histogram)
+    finally:
+        cooccurrence.cv2 = opencv
+
+
+def test_pair_correlation_matches_corrcoef():
+    rng = np.random.default_rng(1)
+    plane = np.cumsum(rng.integers(-3, 4, (120, 90)), axis=1).clip(0, 255).astype(np.uint8)
+
+    expected = np.corrcoef(plane[:, :-1].ravel(), plane[:, 1:].ravel())[0, 1]
+    assert abs(pair_correlation(build_cooccurrence(plane).horizontal[0]) - expected) < 1e-9
+
+
+def test_lsb_replacement_equalizes_value_pairs():
+    rng = np.random.default_rng(2)
+    y, x = np.mgrid[0:400, 0:600]
+    cover = np.stack([x * 0.3 + y * 0.1, y * 0.4, (x + y) * 0.2], axis=-1)
+    cover = (cover + rng.normal(0, 3, cover.shape)).clip(0, 255).astype(np.uint8)
+    stego = (cover & 0xFE) | rng.integers(0, 2, cover.shape, dtype=np.uint8)
+
+    for score in (chi_square_score, histogram_score):
+        assert score(stego, context=AnalysisContext(stego)) > score(cover, context=AnalysisContext(cover)) + 40
+
+
+if __name__ == "__main__":
+    test_chunked_counts_match_direct_counting()
+    test_pair_correlation_matches_corrcoef()
+    test_lsb_replacement_equalizes_value_pairs()
+    print("✅ Co-occurrence tests passed")
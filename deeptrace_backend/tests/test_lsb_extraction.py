@@ -0,0 +1,56 @@
+import numpy as np
+
+from steganalysis.content_validator import validate_content
+from steganalysis.lsb_extraction import STRATEGIES, extract_lsb_payload
+
+
+def _reference_orders(image):
+    # Full-image traversals the prefix strategies must reproduce
+    return {
+        "row_major": image.reshape(-1) & 1,
+        "column_major": np.transpose(image, (1, 0, 2)).reshape(-1) & 1,
+        "channel_r": image[:, :, 0].reshape(-1) & 1,
+        "channel_g": image[:, :, 1].reshape(-1) & 1,
+        "channel_b": image[:, :, 2].reshape(-1) & 1,
+        "reversed": (image.reshape(-1) & 1)[::-1],
+        "bgr": image[:, :, ::-1].reshape(-1) & 1,
+        "bit_plane_2": (image.reshape(-1) >> 1) & 1,
+        "two_bit_lsb": np.stack([(image.reshape(-1) >> 1) & 1, image.reshape(-1) & 1], -1).reshape(-1),
+    }
+
+
+def test_prefix_strategies_match_full_traversals():
+    rng = np.random.default_rng(3)
+    for shape in [(5, 7, 3), (64, 48, 3), (300, 11, 3)]:
+        image = rng.integers(0, 256, shape, dtype=np.uint8)
+        reference = _reference_orders(image)
+
+        for n in (8, 1000, 40000):
+            for name, strategy in STRATEGIES:
+                assert np.array_equal(strategy(image, n), reference[name][:n]), (shape, n, name)
+
+
+def test_extraction_stops_at_first_valid_payload():
+    image = np.random.default_rng(4).integers(0, 256, (80, 80, 3), dtype=np.uint8)
+
+    # Text embedded in BGR order, followed by the legacy END_MARKER
+    bits = np.unpackbits(np.frombuffer(b"Hidden in BGR order\xff\xfe", dtype=np.uint8))
+    bgr = image[:, :, ::-1].reshape(-1)
+    bgr[:len(bits)] = (bgr[:len(bits)] & 0xFE) | bits
+    image = np.ascontiguousarray(bgr.reshape(80, 80, 3)[:, :, ::-1])
+
+    payloads = extract_lsb_payload(image)
+    for payload in payloads:
+        if validate_content(payload["data"])[0] == "plaintext":
+            break
+
+    assert payload["strategy"] == "bgr"
+    assert payload["data"] == b"Hidden in BGR order"
+    # The generator is still inside the bgr strategy: later ones were never read
+    assert next(payloads)["strategy"] == "bgr"
+
+
+if __name__ == "__main__":
+    test_prefix_strategies_match_full_traversals()
+    test_extraction_stops_at_first_valid_payload()
+    print("✅ LSB extraction strategy tests passed")
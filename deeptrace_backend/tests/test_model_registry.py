@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+from steganalysis.model_registry import ModelRegistry
+
+
+def test_fingerprint_does_not_load_the_model():
+    loads = []
+    registry = ModelRegistry(check_interval=0)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "weights.bin")
+        registry.register("model", path, lambda p: loads.append(p) or "loaded")
+
+        assert registry.fingerprint("model") == "absent"
+
+        with open(path, "wb") as f:
+            f.write(b"weights")
+        tag = registry.fingerprint("model")
+        assert tag.startswith("7-")
+        assert loads == []
+
+        # Loading happens on get() only, and matches the fingerprinted file
+        assert registry.get("model") == "loaded"
+        assert loads == [path]
+        assert registry.fingerprint("model") == tag
+
+    assert registry.fingerprint("unregistered") == "absent"
+
+
+if __name__ == "__main__":
+    test_fingerprint_does_not_load_the_model()
+    print("✅ Model registry tests passed")
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from watermark.dct import embed_dct, extract_dct
+from watermark.dwt import embed_dwt, extract_dwt
+from watermark.permutation import FEISTEL, LEGACY, KeyedPermutation, get_deterministic_seed
+
+
+def test_legacy_matches_global_shuffle():
+    for key, size in [("alpha", 1), ("alpha", 1000), ("β-key", 4097)]:
+        np.random.seed(get_deterministic_seed(key))
+        expected = np.arange(size)
+        np.random.shuffle(expected)
+
+        perm = KeyedPermutation(key, size, LEGACY)
+        assert np.array_equal(perm.take(size), expected)
+        assert np.array_equal(np.concatenate(list(perm.chunks(300))), expected)
+
+
+def test_feistel_is_a_bijection_and_lazy():
+    for size in [1, 2, 3, 1000, 4096, 70001]:
+        perm = KeyedPermutation("secret", size, FEISTEL)
+        order = np.concatenate(list(perm.chunks(4096)))
+        assert np.array_equal(np.sort(order), np.arange(size))
+        assert np.array_equal(perm.take(50, start=7), order[7:57])
+
+    a = KeyedPermutation("one", 10 ** 6, FEISTEL).take(64)
+    b = KeyedPermutation("two", 10 ** 6, FEISTEL).take(64)
+    assert not np.array_equal(a, b)
+
+
+def test_concurrent_orderings_do_not_interfere():
+    def order(key):
+        return KeyedPermutation(key, 50000, LEGACY).take(1000)
+
+    keys = [f"k{i % 4}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(order, keys))
+
+    for key, result in zip(keys, results):
+        assert np.array_equal(result, order(key))
+
+
+def test_feistel_watermarks_roundtrip():
+    image = Image.fromarray(np.full((96, 128, 3), 120, dtype=np.uint8))
+
+    marked = embed_dct(image, "key", "hello", permutation=FEISTEL)
+    assert extract_dct(marked, "key", permutation=FEISTEL) == "hello"
+
+    marked = embed_dwt(image, "key", "hello", permutation=FEISTEL)
+    assert extract_dwt(marked, "key", permutation=FEISTEL) == "hello"
+
+
+if __name__ == "__main__":
+    test_legacy_matches_global_shuffle()
+    test_feistel_is_a_bijection_and_lazy()
+    test_concurrent_orderings_do_not_interfere()
+    test_feistel_watermarks_roundtrip()
+    print("✅ Keyed permutation tests passed")
@@ -0,0 +1,31 @@
+from lsb_covers import embed_at_rate, smooth_cover
+from steganalysis.analysis_context import AnalysisContext
+from steganalysis.rs_analysis import rs_estimate, rs_score
+
+
+def test_estimated_rate_tracks_embedding_rate():
+    cover = smooth_cover()
+    assert rs_estimate(cover)["embedding_rate"] < 0.03
+
+    for rate in (0.1, 0.3, 0.6):
+        estimate = rs_estimate(embed_at_rate(cover, rate))
+        assert abs(estimate["embedding_rate"] - rate) < 0.05
+        assert len(estimate["channels"]) == 3
+
+        expected_bytes = rate * cover.size / 8
+        assert abs(estimate["payload_bytes"] - expected_bytes) < 0.05 * cover.size / 8
+
+
+def test_score_reuses_the_context_estimate():
+    image = embed_at_rate(smooth_cover(), 0.3)
+    context = AnalysisContext(image)
+
+    estimate = rs_estimate(image, context)
+    assert rs_estimate(image, context) is estimate
+    assert rs_score(image, context=context) == estimate["score"]
+
+
+if __name__ == "__main__":
+    test_estimated_rate_tracks_embedding_rate()
+    test_score_reuses_the_context_estimate()
+    print("✅ RS estimator tests passed")
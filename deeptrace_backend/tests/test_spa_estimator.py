@@ -0,0 +1,41 @@
+import numpy as np
+
+from lsb_covers import embed_at_rate, smooth_cover
+from steganalysis.analysis_context import AnalysisContext
+from steganalysis.spa_analysis import _trace_sets, spa_estimate, spa_score
+
+
+def test_trace_sets_match_definitions():
+    matrix = np.zeros((256, 256))
+    # X, X, V, W, W, Z
+    for u, v in [(3, 8), (9, 3), (9, 2), (6, 7), (7, 6), (5, 5)]:
+        matrix[u, v] += 1
+
+    assert list(_trace_sets(matrix)) == [2, 1, 2, 1]
+
+
+def test_estimated_rate_tracks_embedding_rate():
+    cover = smooth_cover()
+    assert spa_estimate(cover)["embedding_rate"] < 0.02
+
+    for rate in (0.05, 0.3, 0.6):
+        estimate = spa_estimate(embed_at_rate(cover, rate))
+        assert abs(estimate["embedding_rate"] - rate) < 0.03
+        assert all(abs(ch["embedding_rate"] - rate) < 0.05 for ch in estimate["channels"])
+        assert abs(estimate["payload_bytes"] - rate * cover.size / 8) < 0.03 * cover.size / 8
+
+
+def test_score_reuses_the_context_estimate():
+    image = embed_at_rate(smooth_cover(), 0.3)
+    context = AnalysisContext(image)
+
+    estimate = spa_estimate(image, context)
+    assert spa_estimate(image, context) is estimate
+    assert spa_score(image, context=context) == estimate["score"]
+
+
+if __name__ == "__main__":
+    test_trace_sets_match_definitions()
+    test_estimated_rate_tracks_embedding_rate()
+    test_score_reuses_the_context_estimate()
+    print("✅ SPA estimator tests passed")
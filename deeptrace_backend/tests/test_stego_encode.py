@@ -0,0 +1,54 @@
+import numpy as np
+from PIL import Image
+
+from stego.image.container import FLAG_BINARY, HEADER_SIZE
+from stego.image.encode import encode_png
+from stego.image.lsb import embed_lsb, extract_lsb_bytes
+from stego.image.normalize import normalize_image
+
+
+def test_in_place_embed_survives_png_encoding():
+    rng = np.random.RandomState(3)
+    # Odd width so the payload ends part-way through a row
+    original = rng.randint(0, 256, (61, 97, 3), dtype=np.uint8)
+    secret = rng.bytes(500)
+
+    cover = Image.fromarray(original.copy(), mode="RGB")
+    stego = embed_lsb(cover, secret, in_place=True)
+    assert stego is cover
+
+    for level, strategy in ((9, "default"), (0, "rle")):
+        decoded = normalize_image(encode_png(stego, compress_level=level, strategy=strategy))
+        assert extract_lsb_bytes(decoded) == (secret, FLAG_BINARY)
+
+        pixels = np.asarray(decoded).reshape(-1)
+        touched = np.flatnonzero(pixels != original.reshape(-1))
+        # Only LSBs change, and only within the samples carrying the container
+        assert touched.size
+        assert np.all((pixels[touched] ^ original.reshape(-1)[touched]) == 1)
+        assert touched.max() < (HEADER_SIZE + len(secret)) * 8
+
+
+def test_compress_level_reaches_zlib():
+    # A flat image compresses well, so level 0 (stored) must come out larger
+    image = Image.new("RGB", (64, 64), (120, 30, 200))
+    stored = encode_png(image, compress_level=0).getbuffer().nbytes
+    packed = encode_png(image, compress_level=9).getbuffer().nbytes
+    assert stored > packed
+
+
+def test_unknown_png_strategy_is_rejected():
+    image = Image.new("RGB", (8, 8))
+    try:
+        encode_png(image, strategy="bogus")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    test_in_place_embed_survives_png_encoding()
+    test_compress_level_reaches_zlib()
+    test_unknown_png_strategy_is_rejected()
+    print("✅ Stego encode tests passed")
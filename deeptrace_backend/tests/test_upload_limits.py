@@ -0,0 +1,52 @@
+import io
+
+from flask import Flask, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from utils.upload import UploadRequest, limit_upload_by_name, size_limit_message
+
+MB = 1024 * 1024
+
+
+def _app():
+    app = Flask(__name__)
+    app.request_class = UploadRequest
+
+    @app.route("/upload", methods=["POST"])
+    def upload():
+        # 1MB for images, 4MB for anything else
+        limit_for = lambda name: MB if name.endswith(".png") else 4 * MB
+        if not limit_upload_by_name(request, limit_for, 4 * MB):
+            return jsonify({"error": size_limit_message(4 * MB)}), 400
+        try:
+            size = request.files["file"].stream.size
+        except RequestEntityTooLarge as e:
+            return jsonify({"error": size_limit_message(getattr(e, "limit", 4 * MB))}), 400
+        return jsonify({"size": size})
+
+    return app.test_client()
+
+
+def _post(client, name, size):
+    data = {"file": (io.BytesIO(b"\0" * size), name)}
+    return client.post("/upload", data=data, content_type="multipart/form-data")
+
+
+def test_limit_follows_the_uploaded_file_name():
+    client = _app()
+
+    assert _post(client, "a.png", MB - 1).get_json() == {"size": MB - 1}
+    assert _post(client, "a.bin", 2 * MB).get_json() == {"size": 2 * MB}
+
+    response = _post(client, "a.png", 2 * MB)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == size_limit_message(MB)
+
+    response = _post(client, "a.bin", 5 * MB)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == size_limit_message(4 * MB)
+
+
+if __name__ == "__main__":
+    test_limit_follows_the_uploaded_file_name()
+    print("✅ Upload limit tests passed")
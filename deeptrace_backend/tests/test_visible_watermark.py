@@ -0,0 +1,44 @@
+import numpy as np
+from PIL import Image
+
+from watermark.visible import _render_sprite, embed_visible
+
+
+def test_overlay_only_touches_the_text_box():
+    image = Image.new("RGB", (640, 480), (40, 60, 90))
+    marked = np.asarray(embed_visible(image, "DeepTrace", opacity=0.6))
+
+    changed = np.argwhere((marked != (40, 60, 90)).any(axis=-1))
+    assert changed.size
+    # Bottom-right corner, inside the margin
+    assert changed[:, 0].min() > 240 and changed[:, 1].min() > 320
+    assert changed[:, 0].max() < 470 and changed[:, 1].max() < 630
+
+
+def test_sprite_is_rendered_once_and_reused():
+    image = Image.new("RGB", (300, 300), (0, 0, 0))
+    _render_sprite.cache_clear()
+
+    for _ in range(3):
+        embed_visible(image, "cached", opacity=0.5)
+
+    info = _render_sprite.cache_info()
+    assert info.misses == 1 and info.hits == 2
+
+
+def test_tiled_mode_covers_the_image():
+    image = Image.new("RGB", (600, 400), (40, 60, 90))
+    marked = np.asarray(embed_visible(image, "DeepTrace", opacity=0.6, position="tiled"))
+
+    touched = (marked != (40, 60, 90)).any(axis=-1)
+    # Every quadrant carries some of the repeated text
+    for rows in (slice(0, 200), slice(200, 400)):
+        for cols in (slice(0, 300), slice(300, 600)):
+            assert touched[rows, cols].any()
+
+
+if __name__ == "__main__":
+    test_overlay_only_touches_the_text_box()
+    test_sprite_is_rendered_once_and_reused()
+    test_tiled_mode_covers_the_image()
+    print("✅ Visible watermark tests passed")
@@ -0,0 +1,29 @@
+import numpy as np
+from PIL import Image
+
+from watermark.dct import embed_dct
+from watermark.dwt import embed_dwt
+from watermark.identify import identify_watermark
+
+
+def _cover():
+    g = np.linspace(0, 255, 192 * 256).reshape(192, 256)
+    noise = np.random.RandomState(5).normal(0, 15, g.shape)
+    return Image.fromarray(np.stack([g, np.clip(g + noise, 0, 255), 255 - g], -1).astype(np.uint8))
+
+
+def test_identify_finds_the_embedding_key():
+    keys = {f"customer-{i}": f"secret-{i}" for i in range(300)}
+
+    for watermark_type, embed in (("invisible_dct", embed_dct), ("invisible_dwt", embed_dwt)):
+        marked = embed(_cover(), "secret-42", "Customer 42")
+        matches = identify_watermark(marked, keys, watermark_type)
+
+        assert [m["key_id"] for m in matches] == ["customer-42"]
+        assert matches[0]["message"] == "Customer 42"
+        assert identify_watermark(_cover(), keys, watermark_type) == []
+
+
+if __name__ == "__main__":
+    test_identify_finds_the_embedding_key()
+    print("✅ Watermark identification tests passed")
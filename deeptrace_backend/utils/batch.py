@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .upload import size_limit_message
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", os.cpu_count() or 2))
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", 5000))
+# Whole request body of a batch upload (every file plus the archive)
+BATCH_MAX_TOTAL_SIZE = int(os.environ.get("BATCH_MAX_TOTAL_SIZE", 2 * 1024 * 1024 * 1024))
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def batch_size_limit_message():
+    return f"Batch exceeds {BATCH_MAX_TOTAL_SIZE // (1024 * 1024)}MB limit"
+
+
+# ======================================================
+# PROCESS POOL
+# ======================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """
+    Shared, bounded process pool for batch endpoints.
+    Uses the spawn start method so workers never inherit the server's
+    threads or locks.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=BATCH_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    """Forget a pool whose worker died so the next caller gets a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_completed(tasks, max_pending=None):
+    """
+    Run (tag, fn, args) tasks on the shared pool and yield
+    (tag, result, error) as each one finishes.
+
+    At most `max_pending` tasks are in flight, so a huge batch never
+    queues all of its inputs at once. Exactly one of result/error is set.
+    """
+    pool = get_process_pool()
+    max_pending = max_pending or 2 * BATCH_MAX_WORKERS
+
+    tasks = iter(tasks)
+    pending = {}
+    exhausted = False
+
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    tag, fn, args = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                try:
+                    future = pool.submit(fn, *args)
+                except BrokenProcessPool:
+                    _discard_pool(pool)
+                    pool = get_process_pool()
+                    future = pool.submit(fn, *args)
+                pending[future] = (tag, pool)
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                tag, owner = pending.pop(future)
+                try:
+                    result, error = future.result(), None
+                except BrokenProcessPool as e:
+                    # A worker crashed (e.g. out of memory): fail its tasks,
+                    # keep the batch going on a fresh pool
+                    _discard_pool(owner)
+                    pool = get_process_pool()
+                    result, error = None, e
+                except Exception as e:
+                    result, error = None, e
+                yield tag, result, error
+
+    finally:
+        # Consumer went away (e.g. client disconnected): drop queued work
+        for future in pending:
+            future.cancel()
+
+
+# ======================================================
+# UPLOADED FILES
+# ======================================================
+
+def copy_limited(src, dst, max_size):
+    """
+    Copy a stream in chunks, raising ValueError once more than
+    `max_size` bytes have been read. Returns the number of bytes copied.
+    """
+    copied = 0
+    for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+        copied += len(chunk)
+        if copied > max_size:
+            raise ValueError(size_limit_message(max_size))
+        dst.write(chunk)
+    return copied
+
+
+def iter_batch_files(files, archive=None, max_files=BATCH_MAX_FILES):
+    """
+    Yield (filename, stream) for every uploaded file: the multipart
+    `files` list first, then each regular member of an optional zip
+    `archive`. Streams must be consumed before advancing.
+    """
+    count = 0
+
+    for file in files:
+        if not file or not file.filename:
+            continue
+        count += 1
+        if count > max_files:
+            raise ValueError(f"Batch exceeds {max_files} files")
+        yield file.filename, file.stream
+
+    if archive is None:
+        return
+
+    try:
+        zf = zipfile.ZipFile(archive.stream)
+    except zipfile.BadZipFile:
+        raise ValueError("Archive must be a valid zip file")
+
+    with zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            count += 1
+            if count > max_files:
+                raise ValueError(f"Batch exceeds {max_files} files")
+            with zf.open(info) as member:
+                yield info.filename, member
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+# Number of bits scanned per step while searching for a delimiter.
+# Small enough to stop early on short payloads, large enough to keep
+# NumPy call overhead negligible on full-image scans.
+CHUNK_BITS = 1 << 16
+
+
+# ======================================================
+# BIT HELPERS
+# ======================================================
+
+def marker_to_bits(marker):
+    """
+    Convert a delimiter written as a '0'/'1' string into a uint8 bit array.
+    """
+    return np.frombuffer(marker.encode("ascii"), dtype=np.uint8) - ord("0")
+
+
+def pack_lsb(samples):
+    """
+    Pack the least significant bit of each sample into bytes (MSB first).
+    Trailing bits that do not fill a whole byte are dropped.
+    """
+    length = (len(samples) // 8) * 8
+    return np.packbits(samples[:length] & 1).tobytes()
+
+
+# ======================================================
+# DELIMITER SEARCH
+# ======================================================
+
+def find_marker(samples, marker, chunk_bits=CHUNK_BITS):
+    """
+    Return the bit offset of the first occurrence of `marker` in the LSB
+    stream of `samples`, or -1 if it never occurs.
+
+    Only the LSB of each sample is considered, so raw pixel arrays can be
+    passed directly. The stream is scanned chunk by chunk and the search
+    stops at the first chunk containing a match.
+    """
+    pattern = marker_to_bits(marker)
+    width = len(pattern)
+    total = len(samples)
+
+    for start in range(0, max(total - width + 1, 0), chunk_bits):
+        # Overlap chunks by width - 1 bits so no match straddles a boundary
+        stop = min(start + chunk_bits + width - 1, total)
+        bits = samples[start:stop] & 1
+
+        # Narrow the candidate positions one pattern bit at a time; on
+        # LSB data each step discards about half of the survivors
+        candidates = np.flatnonzero(bits[:len(bits) - width + 1] == pattern[0])
+        for offset in range(1, width):
+            if candidates.size == 0:
+                break
+            candidates = candidates[bits[candidates + offset] == pattern[offset]]
+
+        if candidates.size:
+            return start + int(candidates[0])
+
+    return -1
+
+
+def find_aligned_marker(samples, marker, chunk_bits=CHUNK_BITS):
+    """
+    Return the byte offset of the first occurrence of the byte string
+    `marker` in the LSB stream of `samples` read as whole bytes (MSB
+    first), or -1. Unlike find_marker, only byte-aligned matches count.
+    """
+    pattern = np.frombuffer(marker, dtype=np.uint8)
+    width = len(pattern)
+    total = len(samples) // 8
+    chunk_bytes = max(chunk_bits // 8, 1)
+
+    for start in range(0, max(total - width + 1, 0), chunk_bytes):
+        # Overlap chunks by width - 1 bytes so no match straddles a boundary
+        stop = min(start + chunk_bytes + width - 1, total)
+        packed = np.packbits(samples[start * 8:stop * 8] & 1)
+
+        candidates = np.flatnonzero(packed[:len(packed) - width + 1] == pattern[0])
+        for offset in range(1, width):
+            if candidates.size == 0:
+                break
+            candidates = candidates[packed[candidates + offset] == pattern[offset]]
+
+        if candidates.size:
+            return start + int(candidates[0])
+
+    return -1
+
+
+def decode_until_marker(samples, marker):
+    """
+    Decode the LSB stream of `samples` up to the first `marker`.
+    Returns the payload bytes, or None if the marker is absent.
+    """
+    end = find_marker(samples, marker)
+
+    if end < 0:
+        return None
+
+    return pack_lsb(samples[:end])
@@ -0,0 +1,224 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+# Uploads up to this size stay in memory; larger ones spill to an
+# anonymous temporary file (deleted by the OS even if the worker crashes)
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_THRESHOLD", 8 * 1024 * 1024))
+
+# Allowance for multipart boundaries and headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+# ======================================================
+# SPOOLED UPLOAD CONTAINER
+# ======================================================
+
+class SpooledUpload(io.RawIOBase):
+    """
+    Seekable container the multipart parser writes each uploaded file into.
+
+    Bytes are kept in memory up to `threshold`, then rolled over to an
+    anonymous temporary file. The SHA-256 and size are computed while the
+    bytes stream in, and buffer() exposes the contents without copying.
+    """
+
+    def __init__(self, threshold=UPLOAD_SPOOL_THRESHOLD, max_size=None):
+        super().__init__()
+        self.threshold = threshold
+        self.max_size = max_size
+        self.size = 0
+        self._file = io.BytesIO()
+        self._rolled = False
+        self._sha = hashlib.sha256()
+
+    @property
+    def digest(self):
+        return self._sha.hexdigest()
+
+    @property
+    def in_memory(self):
+        return not self._rolled
+
+    # --------------------------------------
+    # File protocol
+    # --------------------------------------
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        # The parser writes sequentially, so hashing here covers the whole file
+        self._sha.update(data)
+        self.size += len(data)
+
+        if self.max_size is not None and self.size > self.max_size:
+            raise UploadTooLarge(self.max_size)
+
+        if not self._rolled and self._file.tell() + len(data) > self.threshold:
+            self._roll()
+
+        return self._file.write(data)
+
+    def readinto(self, b):
+        return self._file.readinto(b)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def fileno(self):
+        if not self._rolled:
+            raise io.UnsupportedOperation("fileno")
+        return self._file.fileno()
+
+    def close(self):
+        if not self.closed:
+            _close_quietly(self._file)
+        super().close()
+
+    def _roll(self):
+        spilled = tempfile.TemporaryFile()
+        spilled.write(self._file.getbuffer())
+        spilled.seek(self._file.tell())
+        self._file.close()
+        self._file = spilled
+        self._rolled = True
+
+    # --------------------------------------
+    # Zero-copy access
+    # --------------------------------------
+    @contextmanager
+    def buffer(self):
+        """
+        Zero-copy view of the whole upload: a memoryview of the in-memory
+        bytes, or a read-only memory map of the spilled temporary file.
+        """
+        if self.size == 0:
+            yield b""
+            return
+
+        if not self._rolled:
+            view = self._file.getbuffer()
+            try:
+                yield view
+            finally:
+                _close_quietly(view, "release")
+            return
+
+        self._file.flush()
+        mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            _close_quietly(mapped)
+
+
+def _close_quietly(obj, method="close"):
+    # An array still referencing the buffer (e.g. held by a traceback) makes
+    # release fail; the memory is then freed once that reference goes away
+    try:
+        getattr(obj, method)()
+    except BufferError:
+        pass
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    """An uploaded file is over the limit chosen for it by limit_upload_by_name()."""
+
+    def __init__(self, limit):
+        super().__init__(size_limit_message(limit))
+        self.limit = limit
+
+
+class UploadRequest(Request):
+    """Request class that parses uploaded files into SpooledUpload containers."""
+
+    # filename -> byte limit for that file, set per route by limit_upload_by_name()
+    upload_limit_for = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        limit = self.upload_limit_for(filename or "") if self.upload_limit_for else None
+
+        # The part headers come before its body, so a declared length
+        # already over this file's limit is rejected before reading it
+        if limit is not None and total_content_length is not None and total_content_length > limit + MULTIPART_OVERHEAD:
+            raise UploadTooLarge(limit)
+
+        # Bound memory per request, not per file: a body that cannot fit
+        # the in-memory budget (e.g. a large batch) goes straight to disk
+        if total_content_length is None or total_content_length > UPLOAD_SPOOL_THRESHOLD + MULTIPART_OVERHEAD:
+            return SpooledUpload(threshold=0, max_size=limit)
+        return SpooledUpload(max_size=limit)
+
+
+def spooled_upload(file):
+    """
+    The SpooledUpload behind a FileStorage. Streams parsed by another
+    request class are copied into one so callers can rely on
+    size/digest/buffer().
+    """
+    if isinstance(file.stream, SpooledUpload):
+        return file.stream
+
+    upload = SpooledUpload()
+    for chunk in iter(lambda: file.stream.read(1024 * 1024), b""):
+        upload.write(chunk)
+    upload.seek(0)
+    return upload
+
+
+# ======================================================
+# SIZE LIMITS
+# ======================================================
+
+def limit_upload_size(request, max_file_size, max_files=1):
+    """
+    Cap how much of the request body will be read, before the multipart
+    body is parsed. Returns False when the declared Content-Length alone
+    already exceeds the limit, so the caller can reject without reading.
+    Bodies without a Content-Length are cut off by Flask while streaming.
+    """
+    limit = max_files * (max_file_size + MULTIPART_OVERHEAD)
+    request.max_content_length = limit
+
+    return request.content_length is None or request.content_length <= limit
+
+
+def limit_upload_by_name(request, limit_for, max_file_size):
+    """
+    For single-file routes whose limit depends on the kind of file (e.g.
+    20MB images, larger scanned files): limit_for(filename) gives the
+    limit for each uploaded file, max_file_size the largest of them.
+    The body is capped at max_file_size up front, and each file is
+    rejected from the Content-Length as soon as its name is parsed (or
+    cut off at its own limit while streaming).
+    Returns False like limit_upload_size().
+    """
+    request.upload_limit_for = limit_for
+    return limit_upload_size(request, max_file_size)
+
+
+def size_limit_message(max_file_size):
+    return f"File exceeds {max_file_size // (1024 * 1024)}MB limit"
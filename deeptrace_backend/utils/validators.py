@@ -68,4 +68,16 @@ def validate_secret(secret: str):
 
     # Optional: protect against extreme payload sizes
     if len(secret.encode("utf-8")) > 1_000_000:
-        raise ValueError("Secret message too large")
\ No newline at end of file
+        raise ValueError("Secret message too large")
+
+
+def validate_payload(payload: bytes):
+    """
+    Validate a binary secret payload (uploaded file).
+    """
+
+    if not payload:
+        raise ValueError("Secret payload cannot be empty")
+
+    if len(payload) > 1_000_000:
+        raise ValueError("Secret payload too large")
@@ -0,0 +1,271 @@
+import base64
+import io
+import json
+import os
+from collections.abc import Mapping
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+
+from PIL import Image
+from werkzeug.utils import secure_filename
+
+from utils.batch import COPY_CHUNK_SIZE, copy_limited, iter_batch_files, iter_completed
+
+from .dwt import MAX_LEVELS
+from .permutation import MODES
+
+
+MAX_FILE_SIZE = 20 * 1024 * 1024
+
+WATERMARK_TYPES = ("invisible_dct", "invisible_dwt", "invisible_lsb", "visible")
+
+
+# ==========================================
+# Watermark Spec
+# ==========================================
+def parse_spec(fields):
+    """
+    Validate the watermark settings shared by every image of a request
+    (the same fields as /api/watermark/embed). Raises ValueError.
+    """
+    if not isinstance(fields, Mapping):
+        raise ValueError("spec must be a JSON object")
+
+    spec = {
+        "type": fields.get("type"),
+        "secretKey": fields.get("secretKey", ""),
+        "text": fields.get("text"),
+        "opacity": float(fields.get("opacity", 0.5)),
+        "position": fields.get("position", "bottom_right"),
+        "levels": parse_levels(fields.get("levels", 1)),
+        "permutation": parse_permutation(fields.get("permutation"))
+    }
+
+    if not spec["type"] or not spec["text"]:
+        raise ValueError("Missing required fields")
+    if spec["type"] not in WATERMARK_TYPES:
+        raise ValueError("Invalid watermark type")
+
+    return spec
+
+
+def parse_levels(value):
+    """DWT decomposition depth from a request field. Raises ValueError."""
+    try:
+        levels = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("levels must be an integer")
+    if not 1 <= levels <= MAX_LEVELS:
+        raise ValueError(f"levels must be between 1 and {MAX_LEVELS}")
+    return levels
+
+
+def parse_permutation(value):
+    """Permutation mode from a request field (None = server default). Raises ValueError."""
+    if not value:
+        return None
+    if value not in MODES:
+        raise ValueError(f"permutation must be one of: {', '.join(MODES)}")
+    return value
+
+
+def apply_watermark(image, spec):
+    """Embed the watermark described by spec into a PIL image."""
+    watermark_type = spec["type"]
+
+    if watermark_type == "invisible_dct":
+        from .dct import embed_dct
+        return embed_dct(image, spec["secretKey"], spec["text"], permutation=spec["permutation"])
+    if watermark_type == "invisible_dwt":
+        from .dwt import embed_dwt
+        return embed_dwt(image, spec["secretKey"], spec["text"],
+                         levels=spec["levels"], permutation=spec["permutation"])
+    if watermark_type == "visible":
+        from .visible import embed_visible
+        return embed_visible(image, spec["text"], opacity=spec["opacity"], position=spec["position"])
+    if watermark_type == "invisible_lsb":
+        from .lsb import embed_lsb
+        return embed_lsb(image, spec["text"])
+
+    raise ValueError("Invalid watermark type")
+
+
+# ==========================================
+# Worker Task (runs inside the process pool)
+# ==========================================
+def watermark_file_task(in_path, out_path, spec):
+    """Watermark one staged image and save it as PNG next to it."""
+    with Image.open(in_path) as image:
+        result = apply_watermark(image, spec)
+    result.save(out_path, format="PNG")
+    return out_path
+
+
+# ==========================================
+# Upload Staging
+# ==========================================
+def stage_batch(files, archive, temp_dir):
+    """
+    Copy every uploaded image (multipart list and/or zip members) into
+    temp_dir. Returns one entry per file; entries that cannot be staged
+    carry an "error" instead of a "path".
+    """
+    entries = []
+
+    for name, stream in iter_batch_files(files, archive):
+        filename = secure_filename(os.path.basename(name)) or "unnamed"
+        entry = {"filename": name}
+        entries.append(entry)
+
+        path = os.path.join(temp_dir, f"{uuid.uuid4().hex}_{filename}")
+        try:
+            with open(path, "wb") as dst:
+                copy_limited(stream, dst, MAX_FILE_SIZE)
+        except ValueError as e:
+            entry["error"] = str(e)
+            continue
+
+        entry["path"] = path
+        entry["output"] = path + ".out.png"
+
+    return entries
+
+
+def new_batch_dir():
+    return tempfile.mkdtemp(prefix="deeptrace_watermark_")
+
+
+# ==========================================
+# Streaming Output
+# ==========================================
+class _ChunkSink(io.RawIOBase):
+    """Unseekable sink a ZipFile writes into; drain() hands the bytes on."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _output_name(filename, used):
+    # Watermarked images are PNG; keep names unique inside the archive
+    stem = os.path.splitext(os.path.basename(filename))[0] or "image"
+    name = f"{stem}.png"
+    counter = 1
+    while name in used:
+        counter += 1
+        name = f"{stem}_{counter}.png"
+    used.add(name)
+    return name
+
+
+def _iter_results(entries, spec):
+    """
+    (entry, error) as each image finishes; staging errors come first.
+    On success the watermarked PNG is at entry["output"].
+    """
+    staged = []
+    for entry in entries:
+        if "error" in entry:
+            yield entry, entry["error"]
+        else:
+            staged.append(entry)
+
+    tasks = (
+        (entry, watermark_file_task, (entry["path"], entry["output"], spec))
+        for entry in staged
+    )
+    for entry, _, error in iter_completed(tasks):
+        # The input is no longer needed once its task is done
+        _remove(entry["path"])
+        yield entry, None if error is None else str(error)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def stream_zip(entries, spec, temp_dir):
+    """
+    Generator of ZIP bytes: each watermarked PNG is added (stored, since
+    PNG is already compressed) as soon as it is ready, then a
+    manifest.json with the per-file status. Removes temp_dir when done.
+    """
+    started = time.time()
+    sink = _ChunkSink()
+    manifest = []
+    used = set()
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+            for entry, error in _iter_results(entries, spec):
+                if error is not None:
+                    manifest.append({"filename": entry["filename"], "status": "error", "error": error})
+                    continue
+
+                name = _output_name(entry["filename"], used)
+                with open(entry["output"], "rb") as src, zf.open(name, "w", force_zip64=True) as dst:
+                    for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                        dst.write(chunk)
+                        yield sink.drain()
+                _remove(entry["output"])
+
+                manifest.append({"filename": entry["filename"], "status": "ok", "output": name})
+                yield sink.drain()
+
+            zf.writestr("manifest.json", json.dumps({
+                "files": manifest,
+                "elapsed_seconds": round(time.time() - started, 3)
+            }, indent=2))
+
+        yield sink.drain()
+
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def stream_ndjson(entries, spec, temp_dir):
+    """
+    Generator of NDJSON lines, one per image as it finishes (with the PNG
+    as a data URL, like /api/watermark/embed), then a summary line.
+    Removes temp_dir when done.
+    """
+    started = time.time()
+    summary = {"total": len(entries), "succeeded": 0, "failed": 0}
+
+    try:
+        for entry, error in _iter_results(entries, spec):
+            if error is not None:
+                summary["failed"] += 1
+                yield json.dumps({"filename": entry["filename"], "status": "error", "error": error}) + "\n"
+                continue
+
+            with open(entry["output"], "rb") as f:
+                data_url = "data:image/png;base64," + base64.b64encode(f.read()).decode()
+            _remove(entry["output"])
+
+            summary["succeeded"] += 1
+            yield json.dumps({"filename": entry["filename"], "status": "ok", "dataUrl": data_url}) + "\n"
+
+        summary["elapsed_seconds"] = round(time.time() - started, 3)
+        yield json.dumps({"summary": summary}) + "\n"
+
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def text_to_bits(text):
+    """
+    Watermark payload bits as a uint8 array of 0/1: each character as
+    format(ord(c), '08b') followed by a null byte, exactly as the
+    original string-based encoders produced them.
+    """
+    bits = ''.join(format(ord(c), '08b') for c in text) + '00000000'
+    return np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')
+
+
+def decode_null_terminated(bit_chunks):
+    """
+    Decode a stream of bit arrays (in order) into text, stopping at the
+    first byte-aligned null byte. Chunks after the terminator are never
+    requested, so callers can compute them lazily.
+
+    Without a terminator every bit is used; a trailing partial byte
+    becomes one character of its own, as in the original decoders.
+    """
+    decoded = []
+    pending = np.zeros(0, dtype=np.uint8)
+
+    for chunk in bit_chunks:
+        pending = np.concatenate([pending, np.asarray(chunk, dtype=np.uint8)])
+        whole = len(pending) // 8 * 8
+
+        values = np.packbits(pending[:whole])
+        nulls = np.flatnonzero(values == 0)
+        if len(nulls):
+            decoded.append(values[:nulls[0]])
+            return _to_text(decoded)
+
+        decoded.append(values)
+        pending = pending[whole:]
+
+    text = _to_text(decoded)
+    if len(pending):
+        text += chr(int(''.join(map(str, pending)), 2))
+    return text
+
+
+def _to_text(byte_arrays):
+    # chr() of each byte value, i.e. latin-1
+    return b''.join(a.tobytes() for a in byte_arrays).decode('latin-1')
@@ -1,72 +1,108 @@
 import numpy as np
 from PIL import Image
 
-def dct_2d(block):
-    """
-    Apply 2D Discrete Cosine Transform to an 8x8 block.
-    Using explicit formula or matrix multiplication for pure NumPy implementation sans SciPy/OpenCV.
-    """
-    # Create DCT matrix for N=8
-    N = 8
-    n, k = np.meshgrid(np.arange(N), np.arange(N))
+from .bits import decode_null_terminated, text_to_bits
+from .permutation import KeyedPermutation, get_deterministic_seed  # noqa: F401
+
+
+def _dct_matrix(N=8):
     # DCT matrix: C[k, n] = cos( (pi/N) * (n + 0.5) * k )
     # With normalization factors
+    n, k = np.meshgrid(np.arange(N), np.arange(N))
     C = np.cos((np.pi / N) * (n + 0.5) * k) * np.sqrt(2.0 / N)
     C[0, :] /= np.sqrt(2) # First row correction
-    
+    return C
+
+
+# Built once; every transform below reuses it
+DCT_MATRIX = _dct_matrix(8)
+
+# Coupled mid-band coefficients carrying one bit per block, and the
+# embedding strength (robustness)
+U1, V1 = 4, 3
+U2, V2 = 3, 4
+DELTA = 20
+
+# Blocks decoded per step while extracting; extraction stops at the
+# chunk holding the null terminator
+EXTRACT_CHUNK_BLOCKS = 4096
+
+
+def dct_2d(block):
+    """
+    Apply 2D Discrete Cosine Transform to an 8x8 block, or to every block
+    of an (N, 8, 8) stack at once. Pure NumPy (no SciPy/OpenCV).
+    """
     # DCT = C * block * C.T
-    return np.dot(np.dot(C, block), C.T)
+    return DCT_MATRIX @ block @ DCT_MATRIX.T
 
 def idct_2d(block):
     """
-    Apply 2D Inverse Discrete Cosine Transform to an 8x8 block.
+    Apply 2D Inverse Discrete Cosine Transform to an 8x8 block or an
+    (N, 8, 8) stack.
     """
-    N = 8
-    n, k = np.meshgrid(np.arange(N), np.arange(N))
-    C = np.cos((np.pi / N) * (n + 0.5) * k) * np.sqrt(2.0 / N)
-    C[0, :] /= np.sqrt(2)
-    
     # IDCT = C.T * block * C
-    return np.dot(np.dot(C.T, block), C)
+    return DCT_MATRIX.T @ block @ DCT_MATRIX
 
-import hashlib
+def _block_tiles(y_data, blocks_h, blocks_w):
+    """
+    (blocks_h, blocks_w, 8, 8) view of the usable area; fancy-indexing it
+    gathers selected blocks and assigning through it writes them back.
+    """
+    usable = y_data[:blocks_h * 8, :blocks_w * 8]
+    return usable.reshape(blocks_h, 8, blocks_w, 8).swapaxes(1, 2)
 
-def get_deterministic_seed(key):
-    return int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16) % (2**32)
+def _coefficient(blocks, u, v):
+    # Coefficient (u, v) of a centred block B is C[u] . B . C[v]
+    return np.einsum('i,nij,j->n', DCT_MATRIX[u], blocks, DCT_MATRIX[v])
 
-def embed_dct(image, secret_key, watermark_text):
+def block_margins(image):
+    """
+    Soft DCT watermark readout of every usable block, in block index
+    order: (c(U1, V1) - c(U2, V2)) / DELTA. A positive margin reads as
+    bit 1; embedded blocks sit at about +/-1 or beyond.
+    """
+    y_data = np.array(image.convert("YCbCr").getchannel("Y"), dtype=float)
+    h, w = y_data.shape
+    blocks_h_usable = h // 8
+    blocks_w_usable = w // 8
+
+    tiles = _block_tiles(y_data, blocks_h_usable, blocks_w_usable)
+    margins = np.empty(blocks_h_usable * blocks_w_usable)
+
+    # A block row at a time keeps the gathered copy small
+    for r in range(blocks_h_usable):
+        blocks = tiles[r] - 128
+        start = r * blocks_w_usable
+        margins[start:start + blocks_w_usable] = (
+            _coefficient(blocks, U1, V1) - _coefficient(blocks, U2, V2)
+        ) / DELTA
+
+    return margins
+
+def embed_dct(image, secret_key, watermark_text, permutation=None):
     """
     Embeds text into the image using DCT algorithm.
     image: PIL Image object
     secret_key: seed for random location selection
     watermark_text: text to embed
+    permutation: block ordering mode ("legacy" or "feistel"; see
+    watermark.permutation), must match extraction
     """
-    # 1. Preprocess: Resize/Convert to YCbCr
-    # We embed mainly in the Y channel (Luminance) or Blue channel in RGB.
-    # To keep it simple and robust, let's use the Blue channel of RGB or Y of YCbCr.
-    # YCbCr is better for imperceptibility.
-    
+    # 1. Preprocess: Convert to YCbCr and embed in the Y channel
+    # (Luminance); YCbCr is better for imperceptibility.
     img = image.convert("YCbCr")
     y, cb, cr = img.split()
     y_data = np.array(y, dtype=float)
     
     h, w = y_data.shape
     
-    # 2. Pad image to be divisible by 8
-    pad_h = (8 - h % 8) % 8
-    pad_w = (8 - w % 8) % 8
-    if pad_h > 0 or pad_w > 0:
-        y_data = np.pad(y_data, ((0, pad_h), (0, pad_w)), mode='edge')
-    
-    padded_h, padded_w = y_data.shape
-    
-    # 3. Prepare message bits
-    # Convert text to binary
-    bits = ''.join(format(ord(c), '08b') for c in watermark_text)
-    bits += '00000000' # Null terminator
+    # 2. Prepare message bits (null terminated)
+    bits = text_to_bits(watermark_text)
     
-    # 4. Determine capacity and select blocks
-    # FIX: Use original h/w to avoid writing into padded regions that get cropped
+    # 3. Determine capacity and select blocks
+    # Only whole 8x8 blocks inside the original h/w are used, so no
+    # padding is needed and nothing is written into cropped regions
     blocks_h_usable = h // 8
     blocks_w_usable = w // 8
     num_blocks = blocks_h_usable * blocks_w_usable
@@ -74,112 +110,59 @@ def embed_dct(image, secret_key, watermark_text):
     if len(bits) > num_blocks:
         raise ValueError(f"Message too long. Max chars: {num_blocks // 8}")
         
-    # Shuffle block indices based on key
-    np.random.seed(get_deterministic_seed(secret_key))
-    block_indices = np.arange(num_blocks)
-    np.random.shuffle(block_indices)
+    # Key-driven block order; only the blocks actually used are drawn
+    selected = KeyedPermutation(secret_key, num_blocks, permutation).take(len(bits))
+    rows, cols = np.divmod(selected, blocks_w_usable)
+    
+    # 4. Transform every selected block in one batched matmul
+    tiles = _block_tiles(y_data, blocks_h_usable, blocks_w_usable)
+    dct_blocks = dct_2d(tiles[rows, cols] - 128) # Center pixel values
     
     # 5. Embed Bits
+    # Strategy: Ensure a > b for '1', b > a for '0' at two coupled locations
+    val1 = dct_blocks[:, U1, V1].copy()
+    val2 = dct_blocks[:, U2, V2].copy()
     
-    for i, bit in enumerate(bits):
-        idx = block_indices[i]
-        # Use valid blocks width for row/col calculation
-        r = (idx // blocks_w_usable) * 8
-        c = (idx % blocks_w_usable) * 8
-        
-        block = y_data[r:r+8, c:c+8]
-        dct_block = dct_2d(block - 128) # Center pixel values
-        
-        # Embed in mid-band coefficients (e.g., (3,3), (4,2))
-        # Strategy: Ensure a > b for '1', b > a for '0' at two coupled locations
-        # Selecting (4,3) and (3,4) as they are mid-frequency
-        u1, v1 = 4, 3
-        u2, v2 = 3, 4
-        
-        val1 = dct_block[u1, v1]
-        val2 = dct_block[u2, v2]
-        
-        delta = 20 # Strength (robustness)
-        
-        if bit == '1':
-            if val1 <= val2 + delta:
-                dct_block[u1, v1] = val2 + delta / 2
-                dct_block[u2, v2] = val2 - delta / 2
-        else: # bit == '0'
-            if val2 <= val1 + delta:
-                dct_block[u2, v2] = val1 + delta / 2
-                dct_block[u1, v1] = val1 - delta / 2
-                
-        # Reconstruct block
-        y_data[r:r+8, c:c+8] = idct_2d(dct_block) + 128
+    one = bits == 1
+    fix_one = one & (val1 <= val2 + DELTA)
+    fix_zero = ~one & (val2 <= val1 + DELTA)
+    
+    dct_blocks[fix_one, U1, V1] = val2[fix_one] + DELTA / 2
+    dct_blocks[fix_one, U2, V2] = val2[fix_one] - DELTA / 2
+    dct_blocks[fix_zero, U2, V2] = val1[fix_zero] + DELTA / 2
+    dct_blocks[fix_zero, U1, V1] = val1[fix_zero] - DELTA / 2
+    
+    # Reconstruct blocks (writes through the tile view into y_data)
+    tiles[rows, cols] = idct_2d(dct_blocks) + 128
 
     # 6. Clip and reconstruct image
     y_data = np.clip(y_data, 0, 255)
     
-    # Remove padding
-    y_data = y_data[:h, :w]
-    
     y_new = Image.fromarray(y_data.astype(np.uint8), mode='L')
     return Image.merge("YCbCr", (y_new, cb, cr)).convert("RGB")
 
-def extract_dct(image, secret_key):
+def extract_dct(image, secret_key, permutation=None):
     img = image.convert("YCbCr")
     y, _, _ = img.split()
     y_data = np.array(y, dtype=float)
     
     h, w = y_data.shape
     
-    # Pad if necessary (though extraction should work on original size ideally)
-    pad_h = (8 - h % 8) % 8
-    pad_w = (8 - w % 8) % 8
-    if pad_h > 0 or pad_w > 0:
-        y_data = np.pad(y_data, ((0, pad_h), (0, pad_w)), mode='edge')
-        
-    padded_h, padded_w = y_data.shape
-    
-    # Shuffle logic must match embedding
-    # FIX: Use original dimensions h/w to determine blocks
+    # Shuffle logic must match embedding (original dimensions h/w)
     blocks_h_usable = h // 8
     blocks_w_usable = w // 8
     num_blocks = blocks_h_usable * blocks_w_usable
     
-    np.random.seed(get_deterministic_seed(secret_key))
-    block_indices = np.arange(num_blocks)
-    np.random.shuffle(block_indices)
-    
-    bits = ""
-    u1, v1 = 4, 3
-    u2, v2 = 3, 4
+    block_order = KeyedPermutation(secret_key, num_blocks, permutation)
+    tiles = _block_tiles(y_data, blocks_h_usable, blocks_w_usable)
     
-    # We don't know the length, so we iterate until null terminator or reasonable limit
-    for i in range(num_blocks):
-        idx = block_indices[i]
-        r = (idx // blocks_w_usable) * 8
-        c = (idx % blocks_w_usable) * 8
-        
-        block = y_data[r:r+8, c:c+8]
-        dct_block = dct_2d(block - 128)
-        
-        val1 = dct_block[u1, v1]
-        val2 = dct_block[u2, v2]
-        
-        if val1 > val2:
-            bits += '1'
-        else:
-            bits += '0'
-            
-        # Check for null terminator every 8 bits
-        if len(bits) % 8 == 0:
-            if bits[-8:] == '00000000':
-                bits = bits[:-8]
-                break
+    # Only the two compared coefficients are needed.
+    # We don't know the length, so blocks are decoded chunk by chunk
+    # until the null terminator
+    def bit_chunks():
+        for indices in block_order.chunks(EXTRACT_CHUNK_BLOCKS):
+            rows, cols = np.divmod(indices, blocks_w_usable)
+            blocks = tiles[rows, cols] - 128
+            yield _coefficient(blocks, U1, V1) > _coefficient(blocks, U2, V2)
     
-    # Convert bits to string
-    try:
-        chars = []
-        for i in range(0, len(bits), 8):
-            byte = bits[i:i+8]
-            chars.append(chr(int(byte, 2)))
-        return "".join(chars)
-    except Exception:
-        return ""
+    return decode_null_terminated(bit_chunks())
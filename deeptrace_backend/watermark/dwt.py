@@ -1,189 +1,203 @@
 import numpy as np
 from PIL import Image
 
+from .bits import decode_null_terminated, text_to_bits
+from .permutation import KeyedPermutation, get_deterministic_seed  # noqa: F401
+
+
+# QIM quantization step for HL coefficients
+DELTA = 10
+
+# Coefficients decoded per step while extracting; extraction stops at
+# the chunk holding the null terminator
+EXTRACT_CHUNK_BITS = 4096
+
+
 def dwt_2d(layer):
     """
     1-level 2D Haar DWT using NumPy.
-    Input: 2D numpy array (even dims)
+    Input: 2D numpy array (even dims); the dtype is preserved
     Output: LL, LH, HL, HH subbands
     """
-    h, w = layer.shape
-    
     # Rows
     L_row = (layer[:, 0::2] + layer[:, 1::2]) / 2
     H_row = (layer[:, 0::2] - layer[:, 1::2]) / 2
-    
+
     # Cols (applied to row results)
     LL = (L_row[0::2, :] + L_row[1::2, :]) / 2
     LH = (L_row[0::2, :] - L_row[1::2, :]) / 2
     HL = (H_row[0::2, :] + H_row[1::2, :]) / 2
     HH = (H_row[0::2, :] - H_row[1::2, :]) / 2
-    
+
     return LL, LH, HL, HH
 
-def idwt_2d(LL, LH, HL, HH):
+def idwt_2d(LL, LH, HL, HH, out=None):
     """
     1-level 2D Inverse Haar DWT.
+    Writes into `out` (shape (2h, 2w)) when given; only two subband-sized
+    scratch buffers are allocated.
     """
     h, w = LL.shape
-    
-    # Inverse Cols
-    L_row = np.zeros((h*2, w), dtype=float)
-    H_row = np.zeros((h*2, w), dtype=float)
-    
-    L_row[0::2, :] = LL + LH
-    L_row[1::2, :] = LL - LH
-    
-    H_row[0::2, :] = HL + HH
-    H_row[1::2, :] = HL - HH
-    
-    # Inverse Rows
-    layer = np.zeros((h*2, w*2), dtype=float)
-    layer[:, 0::2] = L_row + H_row
-    layer[:, 1::2] = L_row - H_row
-    
-    return layer
-
-import hashlib
-
-def get_deterministic_seed(key):
-    return int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16) % (2**32)
-
-def embed_dwt(image, secret_key, watermark_text):
+    if out is None:
+        out = np.empty((h * 2, w * 2), dtype=LL.dtype)
+
+    # Inverse cols then rows, fused: even output rows come from
+    # LL + LH / HL + HH, odd rows from LL - LH / HL - HH
+    L_row = np.add(LL, LH)
+    H_row = np.add(HL, HH)
+    np.add(L_row, H_row, out=out[0::2, 0::2])
+    np.subtract(L_row, H_row, out=out[0::2, 1::2])
+
+    np.subtract(LL, LH, out=L_row)
+    np.subtract(HL, HH, out=H_row)
+    np.add(L_row, H_row, out=out[1::2, 0::2])
+    np.subtract(L_row, H_row, out=out[1::2, 1::2])
+
+    return out
+
+# ==========================================
+# Multi-level decomposition
+# ==========================================
+# Deepest pyramid accepted from requests; past this the bands of any
+# supported image are only a few coefficients wide
+MAX_LEVELS = 8
+
+def _decompose(y_data, levels):
     """
-    Embeds text into the image using DWT (Haar) algorithm.
-    Embeds in the HL subband (vertical details).
+    Haar pyramid: each level transforms the previous LL, padded to even
+    dims. Returns the final LL and per-level (shape, LH, HL, HH).
     """
-    # 1. Convert to YCbCr, use Y channel
+    bands = []
+    current = y_data
+
+    for _ in range(levels):
+        h, w = current.shape
+        if h % 2 or w % 2:
+            current = np.pad(current, ((0, h % 2), (0, w % 2)), mode='edge')
+        LL, LH, HL, HH = dwt_2d(current)
+        bands.append(((h, w), LH, HL, HH))
+        current = LL
+
+    return current, bands
+
+def _reconstruct(LL, bands):
+    for (h, w), LH, HL, HH in reversed(bands):
+        LL = idwt_2d(LL, LH, HL, HH)[:h, :w]
+    return LL
+
+def _hl_pool(bands, h, w):
+    """
+    The embeddable HL coefficients of every level as one index space:
+    level k contributes its (h >> k) x (w >> k) coefficients that depend
+    only on original (unpadded) pixels. Returns (HL arrays, usable
+    widths, start offset of each level, total capacity).
+    """
+    subbands, widths, sizes = [], [], []
+    for level, (_, _, HL, _) in enumerate(bands, start=1):
+        usable_h, usable_w = h >> level, w >> level
+        subbands.append(HL)
+        widths.append(usable_w)
+        sizes.append(usable_h * usable_w)
+
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    return subbands, widths, starts, int(starts[-1])
+
+def _locate(indices, widths, starts):
+    """Split pool indices into per-level (positions, rows, cols)."""
+    level_of = np.searchsorted(starts, indices, side='right') - 1
+
+    for level, usable_w in enumerate(widths):
+        positions = np.flatnonzero(level_of == level)
+        if len(positions) == 0:
+            continue
+        rows, cols = np.divmod(indices[positions] - starts[level], usable_w)
+        yield level, positions, rows, cols
+
+def _load_y(image):
     img = image.convert("YCbCr")
     y, cb, cr = img.split()
-    y_data = np.array(y, dtype=float)
-    
+    # float32 is exact here: pixels are integers and Haar steps only halve
+    return np.asarray(y, dtype=np.float32), cb, cr
+
+def hl_quantization(image, levels=1):
+    """
+    Soft DWT watermark readout: HL / DELTA for the whole coefficient pool,
+    in pool index order. The bit is round(x) % 2; embedded coefficients
+    sit close to an integer.
+    """
+    y_data, _, _ = _load_y(image)
+    h, w = y_data.shape
+
+    _, bands = _decompose(y_data, levels)
+    subbands, widths, starts, capacity = _hl_pool(bands, h, w)
+
+    pool = np.empty(capacity, dtype=np.float32)
+    for level, (HL, usable_w) in enumerate(zip(subbands, widths)):
+        usable_h = (starts[level + 1] - starts[level]) // max(usable_w, 1)
+        pool[starts[level]:starts[level + 1]] = HL[:usable_h, :usable_w].reshape(-1) / DELTA
+
+    return pool
+
+def embed_dwt(image, secret_key, watermark_text, levels=1, permutation=None):
+    """
+    Embeds text into the image using DWT (Haar) algorithm.
+    Embeds in the HL subband (vertical details) of `levels` decomposition
+    levels; levels=1 is the original single-level format. permutation
+    selects the coefficient ordering mode (see watermark.permutation).
+    """
+    # 1. Convert to YCbCr, use Y channel
+    y_data, cb, cr = _load_y(image)
     h, w = y_data.shape
-    
-    # 2. Pad to even dimensions
-    pad_h = h % 2
-    pad_w = w % 2
-    if pad_h or pad_w:
-        y_data = np.pad(y_data, ((0, pad_h), (0, pad_w)), mode='edge')
-    
-    # 3. Apply DWT
-    LL, LH, HL, HH = dwt_2d(y_data)
-    
-    # 4. Prepare watermark bits
-    bits = ''.join(format(ord(c), '08b') for c in watermark_text)
-    bits += '00000000'
-    
-    # FIX: Only use coefficients that correspond to original image pixels
-    # DWT reduces size by 2. Padding adds coefficients to the right/bottom.
-    usable_h = h // 2
-    usable_w = w // 2
-    capacity = usable_h * usable_w
-    
+
+    # 2. Apply DWT
+    LL, bands = _decompose(y_data, levels)
+
+    # 3. Prepare watermark bits
+    bits = text_to_bits(watermark_text)
+
+    # Only use coefficients that correspond to original image pixels
+    subbands, widths, starts, capacity = _hl_pool(bands, h, w)
+
     if len(bits) > capacity:
         raise ValueError("Message too long for DWT embedding.")
-    
-    # 5. Shuffle indices
-    np.random.seed(get_deterministic_seed(secret_key))
-    indices = np.arange(capacity)
-    np.random.shuffle(indices)
-    
-    # 6. Embed using QIM-like or simple modulation
-    # Here using simple additive modulation for 0/1 differentiation
-    alpha = 5 # Strength
-    
-    for i, bit in enumerate(bits):
-        idx = indices[i]
-        
-        # Map linear index to 2D coordinates in usable region
-        r = idx // usable_w
-        c = idx % usable_w
-        
-        val = HL[r, c] 
-        delta = 10 
-        
-        q = round(val / delta)
-        rem = q % 2
-        
-        if bit == '0':
-            if rem != 0: q += 1 # Make even
-        else: # bit '1'
-            if rem == 0: q += 1 # Make odd
-            
-        HL[r, c] = q * delta
-        
-    # Reshape back (Not needed if we modified HL in place)
-    # HL = flat_HL.reshape(HL.shape) -> REMOVED since we modify 2D HL directly
-    
-    # 7. Inverse DWT
-    y_rec = idwt_2d(LL, LH, HL, HH)
-    
-    # Remove padding
-    y_rec = y_rec[:h, :w]
-    y_rec = np.clip(y_rec, 0, 255)
-    
+
+    # 4. Key-driven coefficient order; only the positions used are drawn
+    selected = KeyedPermutation(secret_key, capacity, permutation).take(len(bits))
+
+    # 5. QIM: quantize each selected coefficient to an even (bit 0) or
+    # odd (bit 1) multiple of DELTA, one gather/scatter per level
+    for level, positions, rows, cols in _locate(selected, widths, starts):
+        HL = subbands[level]
+        q = np.round(HL[rows, cols] / DELTA)
+        q += (q % 2) != bits[positions]
+        HL[rows, cols] = q * DELTA
+
+    # 6. Inverse DWT (padding removed level by level)
+    y_rec = _reconstruct(LL, bands)
+    np.clip(y_rec, 0, 255, out=y_rec)
+
     y_new = Image.fromarray(y_rec.astype(np.uint8), mode='L')
     return Image.merge("YCbCr", (y_new, cb, cr)).convert("RGB")
 
-def extract_dwt(image, secret_key):
+def extract_dwt(image, secret_key, levels=1, permutation=None):
     """
-    Extracts text from DWT (HL subband)
+    Extracts text from DWT (HL subband); levels and permutation must
+    match embedding.
     """
-    img = image.convert("YCbCr")
-    y, _, _ = img.split()
-    y_data = np.array(y, dtype=float)
-    
+    y_data, _, _ = _load_y(image)
     h, w = y_data.shape
-    
-    pad_h = h % 2
-    pad_w = w % 2
-    if pad_h or pad_w:
-        y_data = np.pad(y_data, ((0, pad_h), (0, pad_w)), mode='edge')
-        
-    LL, LH, HL, HH = dwt_2d(y_data)
-    
-    # FIX: Use usable capacity
-    usable_h = h // 2
-    usable_w = w // 2
-    capacity = usable_h * usable_w
-
-    np.random.seed(get_deterministic_seed(secret_key))
-    indices = np.arange(capacity)
-    np.random.shuffle(indices)
-    
-    bits = ""
-    delta = 10
-    
-    # Extract until null terminator or reasonable limit
-    # We iterate a safe amount or until terminator
-    max_bits = min(capacity, 10000) # 10k bits limit
-    
-    for i in range(max_bits):
-        idx = indices[i]
-        
-        r = idx // usable_w
-        c = idx % usable_w
-        
-        val = HL[r, c]
-        
-        q = round(val / delta)
-        rem = q % 2
-        
-        if rem == 0:
-            bits += '0'
-        else:
-            bits += '1'
-            
-        if len(bits) % 8 == 0:
-            if bits[-8:] == '00000000':
-                bits = bits[:-8]
-                break
-                
-    try:
-        chars = []
-        for i in range(0, len(bits), 8):
-            byte = bits[i:i+8]
-            chars.append(chr(int(byte, 2)))
-        return "".join(chars)
-    except Exception:
-        return ""
+
+    _, bands = _decompose(y_data, levels)
+    subbands, widths, starts, capacity = _hl_pool(bands, h, w)
+
+    order = KeyedPermutation(secret_key, capacity, permutation)
+
+    # Decode chunk by chunk until the null terminator (no length cap)
+    def bit_chunks():
+        for chunk in order.chunks(EXTRACT_CHUNK_BITS):
+            bits = np.empty(len(chunk), dtype=np.uint8)
+            for level, positions, rows, cols in _locate(chunk, widths, starts):
+                bits[positions] = np.round(subbands[level][rows, cols] / DELTA) % 2
+            yield bits
+
+    return decode_null_terminated(bit_chunks())
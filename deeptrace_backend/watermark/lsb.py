@@ -1,68 +1,48 @@
-from PIL import Image
+import numpy as np
+
+from utils.bitstream import find_aligned_marker, pack_lsb
+
+# Watermark terminator: the bytes 255, 254
+END_MARKER = '1111111111111110'
+END_BYTES = b'\xff\xfe'
 
 def embed_lsb(image, text):
     """
     Embeds a watermark signature invisibly into the Least Significant Bits (LSB).
+    Bits fill the R, G, B channels pixel by pixel in row-major order;
+    whatever does not fit is dropped.
     """
     img = image.copy()
     if img.mode != 'RGB':
         img = img.convert('RGB')
         
-    # Convert text to binary string
-    binary_text = ''.join(format(ord(i), '08b') for i in text)
-    # Append end marker (255, 254)
-    binary_text += '1111111111111110'
+    # Convert text to binary string and append end marker (255, 254)
+    binary_text = ''.join(format(ord(i), '08b') for i in text) + END_MARKER
+    bits = np.frombuffer(binary_text.encode('ascii'), dtype=np.uint8) - ord('0')
     
-    data_len = len(binary_text)
-    data_idx = 0
+    samples = np.array(img).reshape(-1)
+    n = min(len(bits), len(samples))
     
-    pixels = img.load()
-    width, height = img.size
+    # Clear LSB and set it to the data bit
+    samples[:n] = (samples[:n] & 0xFE) | bits[:n]
     
-    for y in range(height):
-        for x in range(width):
-            pixel = list(pixels[x, y])
-            for c in range(3): # Modify R, G, B channels
-                if data_idx < data_len:
-                    # Clear LSB and set it to the data bit
-                    pixel[c] = (pixel[c] & ~1) | int(binary_text[data_idx])
-                    data_idx += 1
-            pixels[x, y] = tuple(pixel)
-            
-            if data_idx >= data_len:
-                break
-        if data_idx >= data_len:
-            break
-            
+    img.frombytes(samples.tobytes())
     return img
 
 def extract_lsb(image):
     """
     Extracts the invisible watermark signature from the LSB.
+    The LSB stream is read as whole bytes up to the first byte-aligned
+    end marker; without one, every whole byte is returned.
     """
     if image.mode != 'RGB':
         image = image.convert('RGB')
         
-    pixels = image.load()
-    width, height = image.size
+    samples = np.asarray(image).reshape(-1)
     
-    binary_data = ""
-    extracted_text = ""
-    
-    for y in range(height):
-        for x in range(width):
-            pixel = pixels[x, y]
-            for c in range(3):
-                # Extract LSB
-                binary_data += str(pixel[c] & 1)
-                
-                if len(binary_data) == 8:
-                    char_code = int(binary_data, 2)
-                    extracted_text += chr(char_code)
-                    binary_data = ""
-                    
-                    # Check for end marker
-                    if extracted_text.endswith(chr(255) + chr(254)):
-                        return extracted_text[:-2]
-                        
-    return extracted_text
+    end = find_aligned_marker(samples, END_BYTES)
+    if end >= 0:
+        samples = samples[:end * 8]
+        
+    # Each byte maps to chr(byte), i.e. latin-1
+    return pack_lsb(samples).decode('latin-1')
@@ -0,0 +1,180 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+LEGACY = "legacy"
+FEISTEL = "feistel"
+MODES = (LEGACY, FEISTEL)
+
+# "legacy" reproduces the original np.random.shuffle ordering so existing
+# watermarks still extract; "feistel" touches only the indices it uses.
+# Embedding and extraction must use the same mode.
+DEFAULT_MODE = os.environ.get("WATERMARK_PERMUTATION", LEGACY)
+
+FEISTEL_ROUNDS = 6
+
+# Legacy prefixes cached by (key, size, k): repeated identification runs
+# over same-sized images skip the full shuffle per key
+LEGACY_PREFIX_CACHE_SIZE = 4096
+
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def get_deterministic_seed(key):
+    return int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16) % (2**32)
+
+
+# ======================================================
+# KEYED PERMUTATION
+# ======================================================
+
+class KeyedPermutation:
+    """
+    Key-driven pseudo-random ordering of the indices 0..size-1.
+
+    Instances hold all of their state, so concurrent requests never share
+    an RNG. take(k) returns the first k positions of the ordering;
+    chunks(n) walks the whole ordering n positions at a time.
+
+    - legacy: RandomState(seed).shuffle(arange(size)), identical to the
+      original np.random.seed + np.random.shuffle. Built in full on
+      first use, since a Fisher-Yates prefix depends on every swap.
+    - feistel: a balanced 6-round Feistel network keyed from SHA-512 of the key,
+      restricted to [0, size) by cycle walking. Positions are computed
+      on demand, so take(k) costs O(k) regardless of size.
+    """
+
+    def __init__(self, secret_key, size, mode=None):
+        mode = mode or DEFAULT_MODE
+        if mode not in MODES:
+            raise ValueError(f"Unknown permutation mode: {mode}")
+
+        self.secret_key = secret_key
+        self.size = int(size)
+        self.mode = mode
+
+        self._order = None
+
+        if mode == FEISTEL:
+            self._round_keys = _round_keys(secret_key)
+
+    def __len__(self):
+        return self.size
+
+    def take(self, k, start=0):
+        """Positions start..start+k-1 of the ordering (clipped to size)."""
+        stop = min(start + k, self.size)
+        if start >= stop:
+            return np.zeros(0, dtype=np.int64)
+
+        if self.mode == LEGACY:
+            return self._legacy_order()[start:stop]
+
+        positions = np.arange(start, stop, dtype=np.uint64)[None, :]
+        return _feistel(positions, self._round_keys[:, None, None], self.size)[0].astype(np.int64)
+
+    def chunks(self, chunk_size):
+        for start in range(0, self.size, chunk_size):
+            yield self.take(chunk_size, start)
+
+    # --------------------------------------
+    # Legacy (np.random.shuffle compatible)
+    # --------------------------------------
+    def _legacy_order(self):
+        if self._order is None:
+            order = np.arange(self.size)
+            np.random.RandomState(get_deterministic_seed(self.secret_key)).shuffle(order)
+            self._order = order
+        return self._order
+
+
+def take_prefixes(secret_keys, size, k, mode=None):
+    """
+    First k positions of the ordering for each key, as a
+    (len(secret_keys), min(k, size)) array. Feistel orderings for all
+    keys are computed together, broadcasting the per-key round keys.
+    """
+    mode = mode or DEFAULT_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown permutation mode: {mode}")
+
+    k = min(k, size)
+    if not secret_keys:
+        return np.zeros((0, k), dtype=np.int64)
+
+    if mode == LEGACY:
+        return np.stack([_legacy_prefix(key, size, k) for key in secret_keys])
+
+    round_keys = np.stack([_round_keys(key) for key in secret_keys], axis=1)
+    positions = np.tile(np.arange(k, dtype=np.uint64), (len(secret_keys), 1))
+
+    return _feistel(positions, round_keys[:, :, None], size).astype(np.int64)
+
+
+@lru_cache(maxsize=LEGACY_PREFIX_CACHE_SIZE)
+def _legacy_prefix(secret_key, size, k):
+    prefix = KeyedPermutation(secret_key, size, LEGACY).take(k).astype(np.int32)
+    prefix.flags.writeable = False
+    return prefix
+
+
+# ======================================================
+# FEISTEL NETWORK
+# ======================================================
+
+def _round_keys(secret_key):
+    digest = hashlib.sha512(f"feistel:{secret_key}".encode('utf-8')).digest()
+    return np.frombuffer(digest[:8 * FEISTEL_ROUNDS], dtype=np.uint64)
+
+
+def _half_bits(size):
+    # Smallest even bit width covering every index below size
+    return max((max(size - 1, 1).bit_length() + 1) // 2, 1)
+
+
+def _encrypt(x, round_keys, half_bits):
+    shift = np.uint64(half_bits)
+    mask = np.uint64((1 << half_bits) - 1)
+    left, right = x >> shift, x & mask
+
+    for round_key in round_keys:
+        left, right = right, left ^ (_mix(right ^ round_key) & mask)
+
+    return (left << shift) | right
+
+
+def _feistel(positions, round_keys, size):
+    """
+    Map (keys, n) positions through each row's network. round_keys has
+    shape (FEISTEL_ROUNDS, keys, 1).
+
+    The network permutes [0, 4^half_bits); values that land outside
+    [0, size) are encrypted again until they fall inside, which keeps
+    the mapping a bijection on [0, size).
+    """
+    half_bits = _half_bits(size)
+    out = _encrypt(positions, round_keys, half_bits)
+    limit = np.uint64(size)
+
+    rows, cols = np.nonzero(out >= limit)
+    while rows.size:
+        out[rows, cols] = _encrypt(out[rows, cols], round_keys[:, rows, 0], half_bits)
+        inside = out[rows, cols] < limit
+        rows, cols = rows[~inside], cols[~inside]
+
+    return out
+
+
+def _mix(z):
+    # splitmix64 finalizer; uint64 arithmetic wraps
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
@@ -1,16 +1,30 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, send_file, stream_with_context
 from PIL import Image
+from werkzeug.exceptions import RequestEntityTooLarge
 import io
+import json
 import base64
-from .dct import embed_dct, extract_dct
-from .dwt import embed_dwt, extract_dwt
+import shutil
+from utils.batch import BATCH_MAX_FILES, BATCH_MAX_TOTAL_SIZE, batch_size_limit_message
+from utils.upload import limit_upload_size, size_limit_message
+from .batch import (MAX_FILE_SIZE, apply_watermark, parse_levels, parse_permutation, parse_spec,
+                    new_batch_dir, stage_batch, stream_ndjson, stream_zip)
+from .dct import extract_dct
+from .dwt import extract_dwt
+from .identify import IDENTIFY_MAX_KEYS, identify_watermark, load_key_registry, normalize_keys
 
 watermark_bp = Blueprint('watermark', __name__)
 
+# Body allowance per inline identify key (id, secret and JSON punctuation)
+IDENTIFY_KEY_BYTES = 256
+
+def bad_request(message):
+    return jsonify({"status": "error", "error": message}), 400
+
 def image_to_base64(img):
     buffered = io.BytesIO()
     img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+    img_str = base64.b64encode(buffered.getbuffer()).decode()
     return f"data:image/png;base64,{img_str}"
 
 def base64_to_image(base64_string):
@@ -19,66 +33,104 @@ def base64_to_image(base64_string):
     img_data = base64.b64decode(base64_string)
     return Image.open(io.BytesIO(img_data))
 
+def read_image_request():
+    """
+    (fields, image) from either transport: multipart with the raw file in
+    "image" and the other fields as form fields, or JSON with the image
+    as a base64 data URL. image is None when it was not supplied.
+    """
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("image")
+        return request.form, Image.open(upload.stream) if upload else None
+        
+    data = request.json
+    image_data = data.get("image")
+    return data, base64_to_image(image_data) if image_data else None
+
+def limit_image_request():
+    # A base64 body is a third larger than the image it carries
+    if request.mimetype == "multipart/form-data":
+        return limit_upload_size(request, MAX_FILE_SIZE)
+    return limit_upload_size(request, MAX_FILE_SIZE * 4 // 3)
+
+def wants_png():
+    # JSON (data URL) stays the default, including for "Accept: */*"
+    return request.accept_mimetypes.best_match(["application/json", "image/png"]) == "image/png"
+
+def image_response(img, message):
+    """The PNG itself when the client accepts image/png, else the JSON data URL."""
+    if not wants_png():
+        return jsonify({
+            "dataUrl": image_to_base64(img),
+            "message": message
+        })
+        
+    buffered = io.BytesIO()
+    img.save(buffered, format="PNG")
+    buffered.seek(0)
+    return send_file(buffered, mimetype="image/png", download_name="watermarked.png")
+
 @watermark_bp.route("/api/watermark/embed", methods=["POST"])
 def embed():
+    """
+    Accepts JSON ({"image": data URL, ...}) or multipart (raw "image" file
+    plus form fields). Responds with JSON {"dataUrl", "message"} unless the
+    client asks for image/png, which returns the PNG bytes directly.
+    """
+    if not limit_image_request():
+        return bad_request(size_limit_message(MAX_FILE_SIZE))
+        
     try:
-        data = request.json
-        image_data = data.get("image")
-        watermark_type = data.get("type")
-        secret_key = data.get("secretKey", "")
-        text = data.get("text")
-        opacity = float(data.get("opacity", 0.5))
+        data, image = read_image_request()
         
-        if not image_data or not watermark_type or not text:
-            return jsonify({"error": "Missing required fields"}), 400
+        if image is None:
+            return bad_request("Missing required fields")
             
-        image = base64_to_image(image_data)
-        
-        if watermark_type == "invisible_dct":
-            result_image = embed_dct(image, secret_key, text)
-        elif watermark_type == "invisible_dwt":
-            result_image = embed_dwt(image, secret_key, text)
-        elif watermark_type == "visible":
-            from .visible import embed_visible
-            result_image = embed_visible(image, text, opacity=opacity)
-        elif watermark_type == "invisible_lsb":
-            from .lsb import embed_lsb
-            result_image = embed_lsb(image, text)
-        else:
-            return jsonify({"error": "Invalid watermark type"}), 400
+        try:
+            spec = parse_spec(data)
+        except ValueError as e:
+            return bad_request(str(e))
             
-        return jsonify({
-            "dataUrl": image_to_base64(result_image),
-            "message": "Watermark applied successfully"
-        })
+        result_image = apply_watermark(image, spec)
+            
+        return image_response(result_image, "Watermark applied successfully")
         
+    except RequestEntityTooLarge:
+        return bad_request(size_limit_message(MAX_FILE_SIZE))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @watermark_bp.route("/api/watermark/extract", methods=["POST"])
 def extract():
+    """Accepts the same JSON or multipart transports as embed."""
+    if not limit_image_request():
+        return bad_request(size_limit_message(MAX_FILE_SIZE))
+        
     try:
-        data = request.json
-        image_data = data.get("image")
+        data, image = read_image_request()
         watermark_type = data.get("type")
         secret_key = data.get("secretKey", "")
         
-        if not image_data or not watermark_type:
-            return jsonify({"error": "Missing required fields"}), 400
+        if image is None or not watermark_type:
+            return bad_request("Missing required fields")
             
-        image = base64_to_image(image_data)
+        try:
+            permutation = parse_permutation(data.get("permutation"))
+            levels = parse_levels(data.get("levels", 1))
+        except ValueError as e:
+            return bad_request(str(e))
         
         if watermark_type == "invisible_dct":
-            extracted_text = extract_dct(image, secret_key)
+            extracted_text = extract_dct(image, secret_key, permutation=permutation)
         elif watermark_type == "invisible_dwt":
-            extracted_text = extract_dwt(image, secret_key)
+            extracted_text = extract_dwt(image, secret_key, levels=levels, permutation=permutation)
         elif watermark_type == "invisible_lsb":
             from .lsb import extract_lsb
             extracted_text = extract_lsb(image)
         elif watermark_type == "visible":
-            return jsonify({"error": "Extracting from visible watermark is not supported"}), 400
+            return bad_request("Extracting from visible watermark is not supported")
         else:
-            return jsonify({"error": "Invalid watermark type"}), 400
+            return bad_request("Invalid watermark type")
             
         return jsonify({
             "data": {
@@ -86,5 +138,114 @@ def extract():
             }
         })
         
+    except RequestEntityTooLarge:
+        return bad_request(size_limit_message(MAX_FILE_SIZE))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@watermark_bp.route("/api/watermark/identify", methods=["POST"])
+def identify():
+    """
+    Find which registered keys watermarked an image. Keys come from the
+    request ("keys": {key_id: secret} or [secret, ...]) or, if absent,
+    from the WATERMARK_KEY_REGISTRY file. At most IDENTIFY_MAX_KEYS
+    inline keys are accepted.
+    """
+    if not limit_upload_size(request, MAX_FILE_SIZE * 4 // 3 + IDENTIFY_MAX_KEYS * IDENTIFY_KEY_BYTES):
+        return bad_request("Request body too large")
+        
+    try:
+        data = request.json
+        image_data = data.get("image")
+        watermark_type = data.get("type")
+        
+        if not image_data or watermark_type not in ("invisible_dct", "invisible_dwt"):
+            return bad_request("Missing image or unsupported type (invisible_dct/invisible_dwt)")
+            
+        levels = parse_levels(data.get("levels", 1))
+        permutation = parse_permutation(data.get("permutation"))
+            
+        if data.get("keys") is not None:
+            keys = normalize_keys(data["keys"])
+            if len(keys) > IDENTIFY_MAX_KEYS:
+                return bad_request(f"At most {IDENTIFY_MAX_KEYS} keys per request")
+        else:
+            keys = load_key_registry()
+            
+        if not keys:
+            return bad_request("No keys supplied or registered")
+            
+        image = base64_to_image(image_data)
+        matches = identify_watermark(image, keys, watermark_type, levels=levels, permutation=permutation)
+        
+        return jsonify({
+            "data": {
+                "matches": matches,
+                "keys_checked": len(keys)
+            }
+        })
+        
+    except RequestEntityTooLarge:
+        return bad_request("Request body too large")
+    except ValueError as e:
+        return bad_request(str(e))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@watermark_bp.route("/api/watermark/batch", methods=["POST"])
+def batch():
+    """
+    Apply one watermark to many images: a multipart "files" list and/or a
+    zip "archive", with the embed fields (type, text, secretKey, ...) as
+    form fields or as a JSON "spec" field. Images are watermarked in the
+    process pool and streamed back as they finish: a zip of PNGs plus
+    manifest.json (default), or NDJSON when format=ndjson or the client
+    accepts application/x-ndjson.
+    """
+    # Room for every batch file plus the archive and a few form fields
+    request.max_form_parts = BATCH_MAX_FILES + 16
+    
+    # The whole body is capped; each image is checked while it is staged
+    if not limit_upload_size(request, BATCH_MAX_TOTAL_SIZE):
+        return bad_request(batch_size_limit_message())
+        
+    try:
+        fields = json.loads(request.form["spec"]) if "spec" in request.form else request.form
+        spec = parse_spec(fields)
+        files = request.files.getlist("files")
+        archive = request.files.get("archive")
+    except RequestEntityTooLarge:
+        return bad_request(batch_size_limit_message())
+    except ValueError as e:
+        return bad_request(str(e))
+    
+    if not files and archive is None:
+        return bad_request("No files uploaded")
+        
+    output_format = request.form.get("format")
+    if output_format is None:
+        accepted = request.accept_mimetypes.best_match(["application/zip", "application/x-ndjson"])
+        output_format = "ndjson" if accepted == "application/x-ndjson" else "zip"
+    if output_format not in ("zip", "ndjson"):
+        return bad_request("format must be zip or ndjson")
+        
+    temp_dir = new_batch_dir()
+    
+    try:
+        entries = stage_batch(files, archive, temp_dir)
+    except ValueError as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return bad_request(str(e))
+        
+    # The stream generators remove temp_dir once finished or abandoned
+    if output_format == "ndjson":
+        return Response(
+            stream_with_context(stream_ndjson(entries, spec, temp_dir)),
+            mimetype="application/x-ndjson"
+        )
+        
+    return Response(
+        stream_with_context(stream_zip(entries, spec, temp_dir)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": "attachment; filename=watermarked.zip"}
+    )
@@ -1,62 +1,122 @@
+from functools import lru_cache
+
 from PIL import Image, ImageDraw, ImageFont
 
-def embed_visible(image, text, opacity=0.5, position="bottom_right"):
-    """
-    Embeds a visible watermark onto the image using alpha blending.
-    Formula: Iw = alpha * I + (1 - alpha) * W
-    visualized as alpha_composite in PIL for text overlays.
-    """
-    if image.mode != 'RGBA':
-        image = image.convert('RGBA')
-        
-    # Make a blank image for the text, initialized to transparent
-    txt_layer = Image.new('RGBA', image.size, (255, 255, 255, 0))
-    
+# Rendered text sprites kept per (text, font size, opacity); batches that
+# stamp the same overlay render it once
+SPRITE_CACHE_SIZE = 64
+
+# Gap between repetitions in tiled mode, as a fraction of the font size
+TILE_SPACING = 2.0
+
+MARGIN = 20
+
+
+@lru_cache(maxsize=16)
+def _load_font(font_size):
     # Try to load a reasonable font
     try:
-        # Size font relative to image height
-        font_size = max(int(image.height / 15), 20)
-        font = ImageFont.truetype("arial.ttf", font_size)
+        return ImageFont.truetype("arial.ttf", font_size)
     except IOError:
-        font = ImageFont.load_default()
-        
-    draw = ImageDraw.Draw(txt_layer)
-    
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=SPRITE_CACHE_SIZE)
+def _render_sprite(text, font_size, opacity_int):
+    """
+    The text drawn once on a transparent layer just large enough to hold
+    it. Returns (sprite, (ox, oy), (text_width, text_height)), where
+    (ox, oy) is where the text origin sits inside the sprite. Cached
+    sprites are shared, so callers must not modify them.
+    """
+    font = _load_font(font_size)
+    draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+
     # Get text size
     try:
         bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
     except AttributeError:
         # Pillow fallback
-        text_width, text_height = draw.textsize(text, font=font)
-        
+        bbox = (0, 0) + tuple(draw.textsize(text, font=font))
+
+    ox, oy = -min(bbox[0], 0), -min(bbox[1], 0)
+    sprite = Image.new('RGBA', (max(bbox[2] + ox, 1), max(bbox[3] + oy, 1)), (255, 255, 255, 0))
+    ImageDraw.Draw(sprite).text((ox, oy), text, font=font, fill=(255, 255, 255, opacity_int))
+
+    return sprite, (ox, oy), (bbox[2] - bbox[0], bbox[3] - bbox[1])
+
+
+def _composite_at(base, source, sprite, x, y):
+    """
+    Alpha-composite sprite onto base at (x, y), touching only the
+    overlapping box. source supplies the original pixels (it may be RGBA
+    while base is the RGB output).
+    """
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + sprite.width, base.width), min(y + sprite.height, base.height)
+    if left >= right or top >= bottom:
+        return
+
+    region = source.crop((left, top, right, bottom)).convert('RGBA')
+    overlay = sprite.crop((left - x, top - y, right - x, bottom - y))
+    base.paste(Image.alpha_composite(region, overlay).convert('RGB'), (left, top))
+
+
+def embed_visible(image, text, opacity=0.5, position="bottom_right"):
+    """
+    Embeds a visible watermark onto the image using alpha blending.
+    Formula: Iw = alpha * I + (1 - alpha) * W
+    visualized as alpha_composite in PIL for text overlays.
+
+    Only the box under the text is composited. position "tiled" repeats
+    the text over the whole image.
+    """
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    # Size font relative to image height
+    font_size = max(int(image.height / 15), 20)
+
+    # Apply opacity (alpha value 0-255)
+    # The formula uses alpha as the weight for blending.
+    opacity_int = int(255 * opacity)
+
+    sprite, (ox, oy), (text_width, text_height) = _render_sprite(text, font_size, opacity_int)
+
+    # Return RGB to avoid PNG transparency weirdness when unexpected
+    watermarked_image = image.convert('RGB') if image.mode != 'RGB' else image.copy()
     width, height = image.size
-    
+
+    if position == "tiled":
+        _tile(watermarked_image, image, sprite, font_size)
+        return watermarked_image
+
     # Calculate position
-    if position == "bottom_right":
-        x = width - text_width - 20
-        y = height - text_height - 20
-    elif position == "center":
+    if position == "center":
         x = (width - text_width) // 2
         y = (height - text_height) // 2
     elif position == "top_left":
-        x = 20
-        y = 20
+        x = MARGIN
+        y = MARGIN
     else:
-        x = width - text_width - 20
-        y = height - text_height - 20
-        
+        x = width - text_width - MARGIN
+        y = height - text_height - MARGIN
+
     x = max(0, x)
     y = max(0, y)
-        
-    # Apply opacity (alpha value 0-255)
-    # The formula uses alpha as the weight for blending.
-    opacity_int = int(255 * opacity)
-    
-    # Draw text
-    draw.text((x, y), text, font=font, fill=(255, 255, 255, opacity_int))
-    
-    # Alpha composite
-    watermarked_image = Image.alpha_composite(image, txt_layer)
-    return watermarked_image.convert("RGB") # Return RGB to avoid PNG transparency weirdness when unexpected
+
+    _composite_at(watermarked_image, image, sprite, x - ox, y - oy)
+    return watermarked_image
+
+
+def _tile(base, source, sprite, font_size):
+    # One sprite reused across a staggered grid covering the image. Tiles
+    # never overlap (the gap is positive), so each is composited onto its
+    # own box like the single-position path.
+    gap = int(font_size * TILE_SPACING)
+    step_x, step_y = sprite.width + gap, sprite.height + gap
+
+    for row, y in enumerate(range(MARGIN - step_y, base.height, step_y)):
+        shift = (step_x // 2) * (row % 2)
+        for x in range(MARGIN - step_x + shift, base.width, step_x):
+            _composite_at(base, source, sprite, x, y)